@@ -0,0 +1,5 @@
+"""
+Benchmark suite
+
+Run a benchmark from the project root, e.g. `python -m bench.expansions`
+"""
@@ -0,0 +1,115 @@
+"""
+Expansions before the first hit, with and without the learned priors
+
+The shipped priors are trained on examples/, so the numbers on those specs
+are measured on training data. Held-out numbers come from
+- --workloads N:     N generated specs (bench.workload), which the shipped
+                     priors have never seen
+- --leave-one-out:   an extra column where every spec is searched with
+                     priors trained on the expressions of the other specs
+
+Usage:
+  python -m bench.expansions [spec.json...] [--workloads N] [--leave-one-out]
+"""
+
+import argparse
+import glob
+from collections import Counter
+
+from bench.workload import generate
+from jqsyn.loader import load_spec
+from jqsyn.priors import Grammar, default_grammar, pipelines
+from jqsyn.schema import get_schema
+from jqsyn.spec import Spec
+from jqsyn.synthesize import bottom_up, OutOfDepth
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="bench.expansions", description=__doc__)
+    parser.add_argument(
+        "specs", nargs="*", default=sorted(glob.glob("examples/*.json"))
+    )
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--workloads", type=int, default=0, help="add generated specs")
+    parser.add_argument("--leave-one-out", action="store_true")
+    return parser.parse_args()
+
+
+def load_specs(args) -> dict[str, dict]:
+    specs = {}
+    for path in args.specs:
+        try:
+            specs[path] = load_spec(path, ("examples", "constants", "expression"))
+        except ValueError:
+            continue
+    for seed in range(args.workloads):
+        try:
+            specs[f"workload seed={seed}"] = generate(seed=seed)
+        except ValueError:
+            continue
+    return specs
+
+
+def held_out(specs: dict[str, dict], name: str) -> Grammar:
+    """
+    Grammar trained on the expressions of every spec but name
+    """
+    grammar = Grammar()
+    for other, data in specs.items():
+        if other != name and "expression" in data:
+            for kinds in pipelines(data["expression"]):
+                grammar.train(kinds)
+    return grammar
+
+
+def first_hit(data: dict, priors: Grammar, depth: int) -> Counter:
+    """
+    Return the search counters until the first expression is found
+    """
+    examples = data["examples"]
+    spec = Spec(examples, data.get("constants", []))
+    stats = Counter()
+    bottom_up(
+        spec,
+        get_schema([example["input"] for example in examples]),
+        depth,
+        1,
+        priors=priors,
+        stats=stats,
+    )
+    return stats
+
+
+def counts(stats: Counter) -> str:
+    return f"{stats['expanded']}/{stats['verified']}"
+
+
+def main():
+    args = parse_args()
+    specs = load_specs(args)
+    columns = ["uniform", "priors"] + (["held out"] if args.leave_one_out else [])
+    totals = {column: Counter() for column in columns}
+    print(f"{'spec':<32}" + "".join(f" {column:>16}" for column in columns))
+    for path, data in specs.items():
+        grammars = {"uniform": Grammar(), "priors": default_grammar()}
+        if args.leave_one_out:
+            grammars["held out"] = held_out(specs, path)
+
+        row = {}
+        try:
+            for column in columns:
+                row[column] = first_hit(data, grammars[column], args.depth)
+        except OutOfDepth:
+            continue
+        for column in columns:
+            totals[column].update(row[column])
+        print(f"{path:<32}" + "".join(f" {counts(row[c]):>16}" for c in columns))
+
+    print(
+        f"{'total (expanded/verified)':<32}"
+        + "".join(f" {counts(totals[column]):>16}" for column in columns)
+    )
+
+
+if __name__ == "__main__":
+    main()
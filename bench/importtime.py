@@ -0,0 +1,77 @@
+"""
+Start-up cost of the syn command, checked against a budget
+
+Imports the syn entry point under `python -X importtime` a few times and
+fails if the fastest cumulative import time exceeds the budget, or if any of
+the modules that are only needed once a search runs were imported.
+
+Usage:
+  python -m bench.importtime [--budget MS] [--runs N]
+"""
+
+import argparse
+import subprocess
+import sys
+
+ENTRY_POINT = "jqsyn.cli"
+
+# Loaded on first use only
+DEFERRED = [
+    "pyjq",
+    "dataclasses",
+    "asyncio",
+    "multiprocessing",
+    "jqsyn.checkpoint",
+    "jqsyn.distributed",
+    "jqsyn.index",
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="bench.importtime", description=__doc__)
+    parser.add_argument("--budget", type=float, default=60.0, help="milliseconds")
+    parser.add_argument("--runs", type=int, default=5)
+    return parser.parse_args()
+
+
+def importtime(module: str) -> dict[str, int]:
+    """
+    Return the cumulative import time in microseconds of every module
+    imported by importing module in a fresh interpreter
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main() -> bool:
+    args = parse_args()
+    runs = [importtime(ENTRY_POINT) for _ in range(args.runs)]
+    best = min(times[ENTRY_POINT] for times in runs) / 1000
+
+    ok = True
+    print(f"import {ENTRY_POINT}: {best:.1f} ms (budget {args.budget:.1f} ms)")
+    if best > args.budget:
+        print("over budget")
+        ok = False
+
+    for module in DEFERRED:
+        if module in runs[0]:
+            print(f"{module} is imported at start-up")
+            ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(not main())
@@ -0,0 +1,115 @@
+"""
+Scaling of the search building blocks over synthetic workloads
+
+Varies one dimension of bench.workload at a time, the others keep their
+defaults, and reports the time and the peak traced memory of
+- schema:  get_schema (extract_schema and intersect) over the inputs
+- rules:   Schema.rules over every schema reached up to the target depth
+- verify:  Spec.verify of the ground truth expression
+
+Usage:
+  python -m bench.scaling [--dimension NAME...] [--seed N]
+"""
+
+import argparse
+import time
+import tracemalloc
+from typing import Callable
+
+from bench.workload import generate
+from jqsyn.schema import get_schema
+from jqsyn.spec import Spec
+
+SWEEPS = {
+    "width": [2, 4, 8, 16, 32],
+    "nesting": [0, 1, 2, 4, 8],
+    "length": [10, 100, 1000, 10000],
+    "examples": [1, 2, 4, 8, 16],
+    "constants": [0, 1, 2, 4, 8],
+    "depth": [1, 2, 3],
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="bench.scaling", description=__doc__)
+    parser.add_argument(
+        "--dimension", nargs="*", choices=list(SWEEPS), default=list(SWEEPS)
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def measure(f: Callable) -> tuple[object, float, int]:
+    """
+    Return the result of f, its time in milliseconds and its peak memory
+    f is run twice, tracing allocations slows it down too much to time it
+    """
+    start = time.perf_counter()
+    result = f()
+    elapsed = (time.perf_counter() - start) * 1000
+
+    tracemalloc.start()
+    try:
+        f()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def all_rules(spec: Spec, schema, depth: int) -> int:
+    """
+    Call Schema.rules on every schema reachable in depth operators, returns
+    the number of rules
+    """
+    count = 0
+    level = [schema]
+    for _ in range(depth):
+        next_level = []
+        for level_schema in level:
+            try:
+                rules = level_schema.rules(spec)
+            except NotImplementedError:
+                continue
+            count += len(rules)
+            next_level.extend(rule_schema for _, rule_schema in rules)
+        level = next_level
+    return count
+
+
+def cell(elapsed: float, peak: int) -> str:
+    return f"{elapsed:9.2f} ms {peak / 1024:9.1f} KiB"
+
+
+def main():
+    args = parse_args()
+    print(
+        f"{'dimension':<10} {'value':>6} {'schema':>22} {'rules':>22} {'count':>8}"
+        f" {'verify':>22}"
+    )
+    for dimension in args.dimension:
+        for value in SWEEPS[dimension]:
+            data = generate(seed=args.seed, **{dimension: value})
+            examples = data["examples"]
+            inputs = [example["input"] for example in examples]
+            depth = value if dimension == "depth" else 2
+
+            schema, schema_ms, schema_peak = measure(lambda: get_schema(inputs))
+            spec = Spec(examples, data["constants"])
+            count, rules_ms, rules_peak = measure(
+                lambda: all_rules(spec, schema, depth)
+            )
+            (expr_str, _), verify_ms, verify_peak = measure(
+                lambda: spec.verify_str(data["expression"])
+            )
+            assert expr_str is not None, data["expression"]
+
+            print(
+                f"{dimension:<10} {value:>6} {cell(schema_ms, schema_peak)}"
+                f" {cell(rules_ms, rules_peak)} {count:>8}"
+                f" {cell(verify_ms, verify_peak)}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Synthetic workloads
+
+Generates specs in the format of examples/*.json, with the ground truth
+expression under "expression". Every example input is a list of records:
+- width:     keys per record, cycling through string, int and bool values
+- nesting:   levels of records nested under the key "child"
+- length:    records per input list
+- examples:  number of examples
+- constants: number of constants, taken from the leaves of the inputs
+- depth:     operators in the ground truth expression
+
+The expression is a random walk over the canonical extensions given by
+Schema.rules from the schema of the inputs, so it is always in the search
+space of bottom_up, and the outputs are computed by running it.
+
+Usage:
+  python -m bench.workload [--width N] [--nesting N] [--length N]
+                           [--examples N] [--constants N] [--depth N]
+                           [--seed N] [-o spec.json]
+"""
+
+import argparse
+import json
+import random
+import sys
+from typing import Optional
+
+from jqsyn.pipeline import construct
+from jqsyn.rewrite import is_canonical_extension
+from jqsyn.schema import get_schema
+from jqsyn.spec import try_run, Spec
+
+WORDS = ["alpha", "beta", "gamma", "delta", "epsilon"]
+
+# Random walks tried before giving up on a target depth
+ATTEMPTS = 100
+
+
+def record(rng: random.Random, width: int, nesting: int) -> dict:
+    value = {}
+    for i in range(width):
+        kind = i % 3
+        if kind == 0:
+            value[f"f{i}"] = rng.choice(WORDS)
+        elif kind == 1:
+            value[f"f{i}"] = rng.randrange(10)
+        else:
+            value[f"f{i}"] = rng.random() < 0.5
+    if nesting > 0:
+        value["child"] = record(rng, width, nesting - 1)
+    return value
+
+
+def leaves(value) -> list:
+    if isinstance(value, dict):
+        return [leaf for child in value.values() for leaf in leaves(child)]
+    if isinstance(value, list):
+        return [leaf for child in value for leaf in leaves(child)]
+    return [value]
+
+
+def pick_constants(rng: random.Random, inputs: list, count: int) -> list:
+    """
+    Pick count distinct leaves of the inputs, booleans first
+    """
+    typed = sorted(
+        {(type(leaf).__name__, leaf) for value in inputs for leaf in leaves(value)}
+    )
+    booleans = [leaf for name, leaf in typed if name == "bool"]
+    others = [leaf for name, leaf in typed if name != "bool"]
+    rng.shuffle(others)
+    return (booleans + others)[:count]
+
+
+def random_walk(rng: random.Random, spec: Spec, schema, depth: int) -> Optional[str]:
+    expr = []
+    for _ in range(depth):
+        try:
+            rules = [
+                (op, next_schema)
+                for op, next_schema in schema.rules(spec)
+                if is_canonical_extension(expr, op)
+            ]
+        except NotImplementedError:
+            return None
+        if not rules:
+            return None
+        op, schema = rng.choice(rules)
+        expr.append(op)
+    return construct(expr)
+
+
+def generate(
+    width: int = 4,
+    nesting: int = 1,
+    length: int = 10,
+    examples: int = 2,
+    constants: int = 1,
+    depth: int = 2,
+    seed: int = 0,
+) -> dict:
+    """
+    Return a spec with its ground truth expression
+    Raises ValueError if no expression of the depth gives non-empty outputs
+    """
+    rng = random.Random(seed)
+    inputs = [
+        [record(rng, width, nesting) for _ in range(length)] for _ in range(examples)
+    ]
+    spec_constants = pick_constants(rng, inputs, constants)
+    # Outputs are unknown, only the constants of the spec matter
+    spec = Spec([{"input": value, "output": []} for value in inputs], spec_constants)
+    schema = get_schema(inputs)
+
+    for _ in range(ATTEMPTS):
+        expr_str = random_walk(rng, spec, schema, depth)
+        if expr_str is None:
+            continue
+        outputs = [try_run(expr_str, value) for value in inputs]
+        if any(output is None for output in outputs) or not any(outputs):
+            continue
+        return {
+            "examples": [
+                {"input": value, "output": output}
+                for value, output in zip(inputs, outputs)
+            ],
+            "constants": spec_constants,
+            "expression": expr_str,
+        }
+    raise ValueError(f"No expression of depth {depth} found in {ATTEMPTS} attempts")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="bench.workload", description=__doc__)
+    parser.add_argument("--width", type=int, default=4)
+    parser.add_argument("--nesting", type=int, default=1)
+    parser.add_argument("--length", type=int, default=10)
+    parser.add_argument("--examples", type=int, default=2)
+    parser.add_argument("--constants", type=int, default=1)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write the spec here, or stdout")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    data = generate(
+        args.width,
+        args.nesting,
+        args.length,
+        args.examples,
+        args.constants,
+        args.depth,
+        args.seed,
+    )
+    if args.output is None:
+        json.dump(data, sys.stdout, indent=4)
+        sys.stdout.write("\n")
+    else:
+        with open(args.output, "w") as f:
+            json.dump(data, f, indent=4)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
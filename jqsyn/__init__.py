@@ -0,0 +1,32 @@
+"""
+Synthesis of jq expressions from input-output examples
+
+Importing the package loads nothing else, the names below are imported from
+their modules on first access.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "multi_synthesis": "jqsyn.synthesize",
+    "OutOfDepth": "jqsyn.synthesize",
+    "Spec": "jqsyn.spec",
+    "Session": "jqsyn.session",
+    "load_spec": "jqsyn.loader",
+    "synthesize_async": "jqsyn.aio",
+    "distributed_synthesis": "jqsyn.distributed",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
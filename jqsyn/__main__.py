@@ -0,0 +1,87 @@
+"""
+Command line tools
+
+Usage:
+  python -m jqsyn index build [--depth N] [--constants JSON] INDEX INPUT.json...
+  python -m jqsyn index lookup INDEX SPEC.json
+  python -m jqsyn worker HOST:PORT
+"""
+
+import argparse
+import json
+import sys
+
+from jqsyn import distributed, index
+from jqsyn.loader import load_spec
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="jqsyn", description="jqsyn tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = commands.add_parser("index", help="enumeration index")
+    index_commands = index_parser.add_subparsers(dest="index_command", required=True)
+
+    build = index_commands.add_parser("build", help="index the inputs")
+    build.add_argument("index")
+    build.add_argument("inputs", nargs="+", help="JSON documents")
+    build.add_argument("--depth", type=int, default=3)
+    build.add_argument("--constants", default="[]", help="JSON list")
+
+    lookup = index_commands.add_parser("lookup", help="answer a spec")
+    lookup.add_argument("index")
+    lookup.add_argument("spec")
+    lookup.add_argument("--max-results", type=int, default=1)
+
+    worker = commands.add_parser("worker", help="serve a distributed search")
+    worker.add_argument("address", help="HOST:PORT of the coordinator")
+
+    return parser.parse_args()
+
+
+def index_build(args):
+    inputs = []
+    for path in args.inputs:
+        with open(path, "r") as f:
+            inputs.append(json.load(f))
+    count = index.build(inputs, json.loads(args.constants), args.depth, args.index)
+    print(f"Indexed {count} pipelines over {len(inputs)} inputs")
+
+
+def index_lookup(args):
+    data = load_spec(args.spec)
+    results = index.Index(args.index).lookup(
+        data["examples"], data.get("constants", []), args.max_results
+    )
+    if results is None:
+        print("Spec inputs or constants are not indexed")
+        return False
+    if not results:
+        print("No indexed expression satisfies the spec")
+        return False
+    print("\n".join(results))
+    return True
+
+
+def worker(args):
+    if distributed.env_authkey() is None:
+        print(f"Set {distributed.AUTHKEY_VARIABLE} to the key of the coordinator")
+        return False
+    host, port = args.address.rsplit(":", 1)
+    distributed.run_worker((host, int(port)))
+    return True
+
+
+def main():
+    args = parse_args()
+    if args.command == "worker":
+        return worker(args)
+    if args.command == "index":
+        if args.index_command == "build":
+            index_build(args)
+            return True
+        return index_lookup(args)
+
+
+if __name__ == "__main__":
+    sys.exit(not main())
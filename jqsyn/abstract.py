@@ -0,0 +1,267 @@
+"""
+Abstract interpretation of pipelines
+
+Every candidate is run on an abstraction of the example inputs before it is
+run on the inputs themselves. Per example the abstract value of a stream is
+a cardinality range together with a Shape, which over-approximates the
+values in the stream: the range of their container lengths, the shapes of
+their fields and elements and the leaves reachable from them.
+
+The abstract result is checked against the expected output in four domains
+- leaves:      every expected leaf is reachable
+- type:        the output schema admits every expected value
+- cardinality: the number of expected values is within the cardinality range
+- length:      the length of every expected container is within the range
+No operator creates leaves that were not reachable before, so a rejection in
+the leaves domain rules out every extension of the candidate as well. The
+other domains only rule out the candidate itself.
+"""
+
+from collections import Counter
+from typing import Optional
+
+from jqsyn.pipeline import Operator
+from jqsyn.pipeline import All, Any, ForEach, Keys, Sort
+from jqsyn.pipeline import GroupBy, ObjectIndex, SortBy
+from jqsyn.pipeline import Select
+from jqsyn.projection import leaf
+from jqsyn.schema import Schema, BoolSchema, IntSchema, StrSchema
+from jqsyn.schema import DictSchema, ListSchema
+
+BOOL_LEAVES = frozenset([leaf(True), leaf(False)])
+
+
+class Shape:
+    """
+    Over-approximation of a set of JSON values
+    """
+
+    def __init__(self):
+        # Range of the lengths of the containers, None if there are none
+        self.lengths: Optional[tuple[int, int]] = None
+        self.fields: dict[str, Shape] = {}
+        self.list_elems: Optional[Shape] = None
+        self.leaves = set()
+        self._elems = None
+        self._reach = None
+
+    def add(self, value):
+        """
+        Add a concrete value to the set
+        """
+        if isinstance(value, dict):
+            self.add_length(len(value))
+            for key, elem in value.items():
+                self.leaves.add(leaf(key))
+                self.fields.setdefault(key, Shape()).add(elem)
+        elif isinstance(value, list):
+            self.add_length(len(value))
+            # all and any produce booleans out of any list
+            self.leaves.update(BOOL_LEAVES)
+            if self.list_elems is None:
+                self.list_elems = Shape()
+            for elem in value:
+                self.list_elems.add(elem)
+        else:
+            self.leaves.add(leaf(value))
+        return self
+
+    def add_length(self, length: int):
+        if self.lengths is None:
+            self.lengths = (length, length)
+        else:
+            self.lengths = (min(self.lengths[0], length), max(self.lengths[1], length))
+
+    def length_range(self) -> tuple[int, int]:
+        return (0, 0) if self.lengths is None else self.lengths
+
+    def elems(self) -> "Shape":
+        """
+        Shape of the list elements and dictionary values
+        """
+        if self._elems is None:
+            parts = list(self.fields.values())
+            if self.list_elems is not None:
+                parts.append(self.list_elems)
+            self._elems = join(parts)
+        return self._elems
+
+    def reach(self) -> frozenset:
+        """
+        Leaves reachable through any pipeline
+        """
+        if self._reach is None:
+            reach = set(self.leaves)
+            for shape in self.fields.values():
+                reach.update(shape.reach())
+            if self.list_elems is not None:
+                reach.update(self.list_elems.reach())
+            self._reach = frozenset(reach)
+        return self._reach
+
+
+def join(shapes: list[Shape]) -> Shape:
+    """
+    Least upper bound of shapes
+    """
+    if len(shapes) == 1:
+        return shapes[0]
+
+    result = Shape()
+    for shape in shapes:
+        if shape.lengths is not None:
+            result.add_length(shape.lengths[0])
+            result.add_length(shape.lengths[1])
+        result.leaves.update(shape.leaves)
+
+    keys = {key for shape in shapes for key in shape.fields}
+    for key in keys:
+        result.fields[key] = join(
+            [shape.fields[key] for shape in shapes if key in shape.fields]
+        )
+
+    list_elems = [shape.list_elems for shape in shapes if shape.list_elems is not None]
+    if list_elems:
+        result.list_elems = join(list_elems)
+
+    return result
+
+
+def list_shape(lengths: tuple[int, int], elems: Shape) -> Shape:
+    shape = Shape()
+    shape.add_length(lengths[0])
+    shape.add_length(lengths[1])
+    shape.leaves.update(BOOL_LEAVES)
+    shape.list_elems = elems
+    return shape
+
+
+def mul(a, b):
+    return 0 if a == 0 or b == 0 else a * b
+
+
+# Per example: (least cardinality, greatest cardinality, shape)
+AbstractValue = list[tuple[int, int, Shape]]
+
+
+class AbstractFilter:
+    """
+    Rejects candidates whose abstract output cannot match the expected output
+    Rejections are counted per domain in `rejections`
+    """
+
+    def __init__(self, spec):
+        self.outputs = [example["output"] for example in spec.examples]
+        self.leaves = [
+            frozenset(leaf(value) for value in flattened)
+            for flattened in spec.output_flattens
+        ]
+        self.lengths = [container_lengths(output) for output in self.outputs]
+        self.admitted = {}
+        self.rejections = Counter()
+
+    def initial(self, spec) -> AbstractValue:
+        return [(1, 1, Shape().add(example["input"])) for example in spec.examples]
+
+    def transfer(self, value: AbstractValue, op: Operator) -> AbstractValue:
+        return [transfer(lo, hi, shape, op) for lo, hi, shape in value]
+
+    def reject(self, value: AbstractValue, schema: Schema) -> Optional[str]:
+        """
+        Return the domain in which the candidate is rejected, if any
+        """
+        for i, (lo, hi, shape) in enumerate(value):
+            domain = None
+            if not self.leaves[i] <= shape.reach():
+                domain = "leaves"
+            elif not self.admits(schema, i):
+                domain = "type"
+            elif not lo <= len(self.outputs[i]) <= hi:
+                domain = "cardinality"
+            elif not self.lengths_admit(shape, i):
+                domain = "length"
+
+            if domain is not None:
+                self.rejections[domain] += 1
+                return domain
+
+        return None
+
+    def admits(self, schema: Schema, i: int) -> bool:
+        # Only the schema class matters
+        key = (type(schema), i)
+        if key not in self.admitted:
+            self.admitted[key] = all(admits(schema, elem) for elem in self.outputs[i])
+        return self.admitted[key]
+
+    def lengths_admit(self, shape: Shape, i: int) -> bool:
+        if self.lengths[i] is None:
+            return True
+        lo, hi = shape.length_range()
+        return lo <= self.lengths[i][0] and self.lengths[i][1] <= hi
+
+
+def transfer(lo: int, hi: int, shape: Shape, op: Operator) -> tuple[int, int, Shape]:
+    """
+    Abstract semantics of the operators
+    """
+    if isinstance(op, ObjectIndex):
+        return lo, hi, shape.fields.get(op.index, Shape())
+
+    if isinstance(op, ForEach):
+        length_lo, length_hi = shape.length_range()
+        return mul(lo, length_lo), mul(hi, length_hi), shape.elems()
+
+    if isinstance(op, Select):
+        return 0, hi, shape
+
+    if isinstance(op, (Sort, SortBy)):
+        return lo, hi, shape
+
+    if isinstance(op, GroupBy):
+        length_lo, length_hi = shape.length_range()
+        group = list_shape((min(1, length_hi), length_hi), shape.elems())
+        return lo, hi, list_shape((min(1, length_lo), length_hi), group)
+
+    if isinstance(op, Keys):
+        keys = Shape()
+        keys.leaves.update(leaf(key) for key in shape.fields)
+        return lo, hi, list_shape(shape.length_range(), keys)
+
+    if isinstance(op, (All, Any)):
+        bools = Shape()
+        bools.leaves.update(BOOL_LEAVES)
+        return lo, hi, bools
+
+    raise NotImplementedError(f"No abstract semantics for {op}")
+
+
+def admits(schema: Schema, value) -> bool:
+    """
+    Whether a value can have the schema
+    NoneSchema and AnySchema admit everything since heterogeneous values
+    intersect to NoneSchema
+    """
+    if isinstance(schema, BoolSchema):
+        return isinstance(value, bool)
+    if isinstance(schema, IntSchema):
+        if isinstance(value, float):
+            return value.is_integer()
+        return isinstance(value, int) and not isinstance(value, bool)
+    if isinstance(schema, StrSchema):
+        return isinstance(value, str)
+    if isinstance(schema, ListSchema):
+        return isinstance(value, list)
+    if isinstance(schema, DictSchema):
+        return isinstance(value, dict)
+    return True
+
+
+def container_lengths(output: list) -> Optional[tuple[int, int]]:
+    """
+    Range of the lengths of the containers in an output stream
+    """
+    lengths = [len(elem) for elem in output if isinstance(elem, (list, dict))]
+    if not lengths:
+        return None
+    return min(lengths), max(lengths)
@@ -0,0 +1,153 @@
+"""
+asyncio interface
+
+The search is CPU bound and would hold the GIL against the event loop, so by
+default it runs in a process pool. A manager process holds a cancellation
+event and a result queue that work across processes. The search puts every
+expression on the queue as soon as it is found, and a thread of the caller's
+process relays them to the event loop, blocked on the queue without holding
+the GIL. Cancelling the consuming task, or letting its deadline pass, sets
+the event. bottom_up polls it before every expansion and candidate, at most
+every POLL_INTERVAL seconds, so an abandoned search stops instead of running
+to OutOfDepth.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from multiprocessing import Manager
+from multiprocessing.managers import SyncManager
+from typing import AsyncIterator, Optional
+
+from jqsyn.synthesize import multi_synthesis
+
+# Seconds between two checks of the cancellation event
+POLL_INTERVAL = 0.01
+
+# Default executor and the manager of the events and queues, started on
+# first use
+_executor: Optional[ProcessPoolExecutor] = None
+_manager: Optional[SyncManager] = None
+
+
+class SearchCancelled(Exception):
+    pass
+
+
+def default_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor()
+    return _executor
+
+
+def manager() -> SyncManager:
+    global _manager
+    if _manager is None:
+        _manager = Manager()
+    return _manager
+
+
+def search(
+    examples: list[dict],
+    constants: list,
+    depth: int,
+    max_results: int,
+    cancelled,
+    results,
+):
+    """
+    Executor task: run multi_synthesis, putting ("result", expr_str),
+    ("error", exception) and finally ("done",) on results
+    """
+    checked = time.monotonic()
+
+    def poll(worklist: list):
+        nonlocal checked
+        now = time.monotonic()
+        if now - checked < POLL_INTERVAL:
+            return
+        checked = now
+        if cancelled.is_set():
+            raise SearchCancelled()
+
+    def put(expr_str: str):
+        results.put(("result", expr_str))
+
+    try:
+        # The union fallback only returns its expression at the end
+        for expr_str in multi_synthesis(
+            examples, constants, depth, max_results, poll=poll, on_result=put
+        ):
+            put(expr_str)
+    except SearchCancelled:
+        pass
+    except Exception as e:
+        results.put(("error", e))
+    finally:
+        results.put(("done",))
+
+
+async def synthesize_async(
+    examples: list[dict],
+    constants: list = [],
+    depth: int = 3,
+    max_results: int = 1,
+    timeout: Optional[float] = None,
+    executor: Optional[Executor] = None,
+) -> AsyncIterator[str]:
+    """
+    Yield up to max_results expressions satisfying the examples as they are
+    found
+    Raises TimeoutError if the search is not over within timeout seconds.
+    The search runs in executor, a process pool shared by all the searches
+    if None.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    cancelled = manager().Event()
+    results = manager().Queue()
+    if executor is None:
+        executor = default_executor()
+
+    def relay():
+        while True:
+            message = results.get()
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, message)
+            except RuntimeError:
+                # The loop is closed, nobody is waiting anymore
+                cancelled.set()
+            if message[0] == "done":
+                return
+
+    def failed(future: Future):
+        # The task did not run to its end, e.g. a worker process died
+        if future.cancelled():
+            results.put(("done",))
+        elif future.exception() is not None:
+            results.put(("error", future.exception()))
+            results.put(("done",))
+
+    threading.Thread(target=relay, daemon=True).start()
+    executor.submit(
+        search, examples, constants, depth, max_results, cancelled, results
+    ).add_done_callback(failed)
+
+    deadline = None if timeout is None else loop.time() + timeout
+    found = []
+    try:
+        while len(found) < max_results:
+            remaining = None if deadline is None else deadline - loop.time()
+            message = await asyncio.wait_for(queue.get(), remaining)
+            if message[0] == "done":
+                break
+            if message[0] == "error":
+                raise message[1]
+            # Phases of the search may find the same expression again
+            if message[1] not in found:
+                found.append(message[1])
+                yield message[1]
+    finally:
+        cancelled.set()
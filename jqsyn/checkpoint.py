@@ -0,0 +1,153 @@
+"""
+Checkpointing of searches
+
+A checkpoint holds everything needed to continue a search: the arguments of
+multi_synthesis, the phase of the search (on the projected or the original
+inputs), the frontier and the results found so far. Frontier entries are
+stored as (priority, length, cost, expr, schema) tuples, the abstract values
+are recomputed from the expressions on resume.
+
+The spec (examples, constants, depth and max_results) is written once, as
+JSON next to the checkpoint at path + SPEC_SUFFIX. Every checkpoint is then
+a zlib compressed pickle of the phase, the frontier and the results only,
+with the hash of the spec it belongs to. The frontier is copied in the
+search loop, but pickling, compression and the write itself happen in a
+background thread, and a new write is skipped while one is in flight.
+
+Loading a checkpoint unpickles it, and unpickling a crafted file runs
+arbitrary code: only resume from checkpoints written by your own searches.
+"""
+
+import json
+import os
+import pickle
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from hashlib import blake2b
+from typing import Optional
+
+MAGIC = b"JQSYNCK2"
+
+SPEC_SUFFIX = ".spec.json"
+
+# (priority, length, cost, expr, schema)
+Frontier = list[tuple]
+
+
+@dataclass
+class Checkpoint:
+    examples: list[dict]
+    constants: list
+    depth: int
+    max_results: int
+    phase: str
+    frontier: Frontier
+    results: list[str]
+
+
+class Checkpointer:
+    """
+    Periodically writes checkpoints of a search to path
+    """
+
+    def __init__(
+        self,
+        path: str,
+        examples: list[dict],
+        constants: list,
+        depth: int,
+        max_results: int,
+        interval: float = 60.0,
+    ):
+        self.path = path
+        self.examples = examples
+        self.constants = constants
+        self.depth = depth
+        self.max_results = max_results
+        self.interval = interval
+        self.phase = None
+        self.last = time.monotonic()
+        self.writer: Optional[threading.Thread] = None
+        # Hash of the spec file, once it is written
+        self.spec_hash: Optional[bytes] = None
+
+    def start(self, phase: str):
+        self.phase = phase
+
+    def due(self) -> bool:
+        """
+        Whether the interval elapsed and no write is in flight
+        """
+        if time.monotonic() - self.last < self.interval:
+            return False
+        return self.writer is None or not self.writer.is_alive()
+
+    def save(self, frontier: Frontier, results: list[str], block: bool = True):
+        self.wait()
+        self.last = time.monotonic()
+        self.writer = threading.Thread(
+            target=self.write, args=(self.phase, list(frontier), list(results))
+        )
+        self.writer.start()
+        if block:
+            self.wait()
+
+    def write(self, phase: str, frontier: Frontier, results: list[str]):
+        if self.spec_hash is None:
+            spec = {
+                "examples": self.examples,
+                "constants": self.constants,
+                "depth": self.depth,
+                "max_results": self.max_results,
+            }
+            data = json.dumps(spec).encode()
+            replace(self.path + SPEC_SUFFIX, data)
+            self.spec_hash = blake2b(data).digest()
+        state = (self.spec_hash, phase, frontier, results)
+        data = zlib.compress(pickle.dumps(state, pickle.HIGHEST_PROTOCOL))
+        replace(self.path, MAGIC + data)
+
+    def wait(self):
+        if self.writer is not None:
+            self.writer.join()
+            self.writer = None
+
+
+def replace(path: str, data: bytes):
+    # Never leave a truncated file behind
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def load(path: str) -> Checkpoint:
+    """
+    Load a checkpoint and its spec
+    Raises ValueError if path is not a checkpoint or its spec does not match
+    The checkpoint is unpickled, only load files you trust
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a jqsyn checkpoint")
+    spec_hash, phase, frontier, results = pickle.loads(
+        zlib.decompress(data[len(MAGIC) :])
+    )
+
+    with open(path + SPEC_SUFFIX, "rb") as f:
+        data = f.read()
+    if blake2b(data).digest() != spec_hash:
+        raise ValueError(f"{path}{SPEC_SUFFIX} is not the spec of {path}")
+    spec = json.loads(data)
+    return Checkpoint(
+        spec["examples"],
+        spec["constants"],
+        spec["depth"],
+        spec["max_results"],
+        phase,
+        frontier,
+        results,
+    )
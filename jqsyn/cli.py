@@ -0,0 +1,133 @@
+"""
+The syn command
+
+Lives in the package so that it is byte-compiled like the rest of jqsyn,
+the syn script only calls main. The modules of optional features are
+imported when they are used, to keep start-up short.
+"""
+
+import argparse
+import json
+import os
+
+from jqsyn.synthesize import multi_synthesis, union_fallback, OutOfDepth
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="syn", description="Synthesizer")
+    parser.add_argument("example", nargs="?")
+    parser.add_argument("--checkpoint", help="periodically save the search here")
+    parser.add_argument(
+        "--checkpoint-interval", type=float, default=60.0, help="seconds"
+    )
+    parser.add_argument(
+        "--resume",
+        help="continue the search of a checkpoint (unpickled, only resume your own)",
+    )
+    parser.add_argument("--index", help="enumeration index to look up first")
+    parser.add_argument(
+        "--workers", type=int, help="distribute the search over local workers"
+    )
+    parser.add_argument(
+        "--listen", help="HOST:PORT for workers started with python -m jqsyn worker"
+    )
+    parser.add_argument(
+        "--lookahead",
+        action="store_true",
+        help="prune the last operator with witnesses of the expected outputs",
+    )
+    args = parser.parse_args()
+    if (args.example is None) == (args.resume is None):
+        parser.error("exactly one of example and --resume is required")
+    if args.listen is not None and not os.environ.get("JQSYN_AUTHKEY"):
+        parser.error("--listen requires the worker key in JQSYN_AUTHKEY")
+    if args.workers is not None:
+        minimum = 1 if args.listen is None else 0
+        if args.workers < minimum:
+            parser.error("--workers must be at least 1, or 0 with --listen")
+    return args
+
+
+def main():
+    args = parse_args()
+    resume = None
+    if args.resume is not None:
+        from jqsyn import checkpoint
+
+        resume = checkpoint.load(args.resume)
+        spec = resume.examples
+        constants = resume.constants
+        depth = resume.depth
+        max_results = resume.max_results
+    else:
+        with open(args.example, "r") as f:
+            data = json.load(f)
+        spec = data["examples"]
+        constants = []
+        if "constants" in data:
+            constants = data["constants"]
+        depth = 3
+        max_results = 1
+
+    checkpointer = None
+    path = args.checkpoint or args.resume
+    if path is not None:
+        from jqsyn.checkpoint import Checkpointer
+
+        checkpointer = Checkpointer(
+            path, spec, constants, depth, max_results, args.checkpoint_interval
+        )
+
+    if args.workers is not None or args.listen is not None:
+        from jqsyn.distributed import distributed_synthesis, env_authkey
+
+        address = ("localhost", 0)
+        authkey = None
+        if args.listen is not None:
+            host, port = args.listen.rsplit(":", 1)
+            address = (host, int(port))
+            authkey = env_authkey()
+
+        expr_str = distributed_synthesis(
+            spec,
+            constants,
+            depth,
+            max_results,
+            address,
+            authkey,
+            workers=args.workers or 0,
+        )
+        print("Synthesized")
+        print("\n".join(expr_str))
+        return
+
+    if args.lookahead and resume is None:
+        from jqsyn.lookahead import lookahead_synthesis
+
+        try:
+            expr_str = lookahead_synthesis(spec, constants, depth, max_results)
+        except OutOfDepth:
+            # Same fallback as multi_synthesis, without searching again
+            expr_str = union_fallback(spec, constants, depth)
+        print("Synthesized")
+        print("\n".join(expr_str))
+        return
+
+    enumeration_index = None
+    if args.index is not None:
+        from jqsyn.index import Index
+
+        enumeration_index = Index(args.index)
+
+    expr_str = multi_synthesis(
+        spec,
+        constants,
+        depth,
+        max_results,
+        checkpoint=checkpointer,
+        resume=resume,
+        index=enumeration_index,
+    )
+    expr_str = "\n".join(expr_str)
+    print("Synthesized")
+    print(expr_str)
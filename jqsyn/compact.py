@@ -0,0 +1,48 @@
+"""
+Compact in-memory representation of JSON values
+
+Strings (dictionary keys and values) are interned while the document is
+parsed, so a string repeated across the records of a large input is stored
+once. The result is made of plain dicts and lists and can be handed to jq
+unchanged.
+
+Containers are not shared: hash-consing them needs a key per container,
+which costs more memory during the load than sharing saves on real inputs.
+Strings directly inside lists are not interned, the json module only has a
+hook for objects.
+"""
+
+import json
+
+
+class Interner:
+    """
+    object_pairs_hook of json.load interning the strings of every object
+    One interner can be used across several documents.
+    """
+
+    def __init__(self):
+        self.strings = {}
+
+    def __call__(self, pairs: list) -> dict:
+        strings = self.strings
+        return {
+            strings.setdefault(key, key): (
+                strings.setdefault(value, value) if type(value) is str else value
+            )
+            for key, value in pairs
+        }
+
+
+def load(f, interner=None):
+    """
+    Parse the JSON document of a file with its strings interned
+    """
+    return json.load(f, object_pairs_hook=interner or Interner())
+
+
+def loads(text, interner=None):
+    """
+    Parse a JSON document with its strings interned
+    """
+    return json.loads(text, object_pairs_hook=interner or Interner())
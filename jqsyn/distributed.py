@@ -0,0 +1,460 @@
+"""
+Distributed search
+
+A coordinator expands the pipelines up to a prefix depth (the first one or
+two operators from Schema.rules), verifies them itself and hands every
+remaining prefix to the workers as a partition. Workers connect over TCP and
+run bottom_up from the partitions they are given, reporting expressions as
+soon as they find them.
+
+Partitions are handed out on request. When there is nothing left to hand
+out while some worker is idle, the coordinator asks a busy worker to donate
+half of its frontier, which becomes a new partition. Once max_results
+expressions are found, or every partition is exhausted, all the workers are
+told to stop. If no worker is connected while partitions are left, for
+WORKER_TIMEOUT seconds or because every local worker exited, the search is
+given up and distributed_synthesis runs it locally instead. Results are
+returned in the order they are found, which need not be the order bottom_up
+would rank them in.
+
+Local workers are forked before the coordinator accepts connections. They
+close their copy of its listening socket first thing, so the port is closed
+once the coordinator is done, and the coordinator keeps stopping the local
+workers that connect late until each of them connected or exited.
+
+Local workers read the examples from a shared memory segment (see
+jqsyn.shared) instead of receiving them over their connection.
+
+Messages are pickles, so anyone who can authenticate can run code on the
+coordinator and on the workers. Local workers are given a random key, remote
+workers started with python -m jqsyn worker read theirs from JQSYN_AUTHKEY,
+which must then be set for the coordinator too.
+
+Messages
+- coordinator to worker: ("spec", examples, constants, depth, max_results),
+  ("work", frontier), ("steal",), ("stop",)
+  A worker joining once the search is over is sent ("stop",) instead of the
+  spec.
+- worker to coordinator: ("join", segment), ("ready",), ("result", expr_str),
+  ("donate", frontier)
+A worker joins with the name of the shared segment it can read the examples
+from, or None. The spec message carries None examples and constants when the
+segment is the coordinator's.
+"""
+
+import os
+import socket
+import time
+from collections import Counter, deque
+from heapq import heapify
+from multiprocessing import AuthenticationError, get_context, Process
+from multiprocessing.connection import Client, Connection, wait
+from multiprocessing.connection import answer_challenge, deliver_challenge
+from typing import Optional
+
+from jqsyn.abstract import AbstractFilter
+from jqsyn.checkpoint import Checkpoint, Frontier
+from jqsyn.pipeline import identity
+from jqsyn.priors import default_grammar, kind, START
+from jqsyn.rewrite import is_canonical_extension
+from jqsyn.schema import get_schema
+from jqsyn.shared import SharedExamples, load
+from jqsyn.spec import Spec
+from jqsyn.synthesize import bottom_up, multi_synthesis, snapshot
+from jqsyn.synthesize import union_fallback, OutOfDepth
+
+# Environment variable holding the key shared with remote workers
+AUTHKEY_VARIABLE = "JQSYN_AUTHKEY"
+
+# Calls of poll (one per expansion and per candidate) between two checks
+# for coordinator messages
+POLL_INTERVAL = 16
+
+# Seconds without any connected worker before the search is given up
+WORKER_TIMEOUT = 60.0
+
+# Seconds given to the local workers to stop once the search is over
+STOP_TIMEOUT = 10.0
+
+
+def env_authkey() -> Optional[bytes]:
+    """
+    Key shared with remote workers, None if it is not set
+    """
+    return os.environb.get(AUTHKEY_VARIABLE.encode()) or None
+
+
+def partition(
+    spec: Spec, input_schema, depth: int, prefix_depth: int
+) -> tuple[list[str], list[Frontier]]:
+    """
+    Expand the pipelines up to prefix_depth operators
+    Returns the expressions found on the way and one partition per prefix
+    that can still be extended
+    """
+    prefilter = AbstractFilter(spec)
+    priors = default_grammar()
+    results = []
+
+    expr_str, score = spec.verify(identity())
+    if expr_str is not None:
+        results.append(expr_str)
+    level = [(score, 0, 0.0, identity(), input_schema, prefilter.initial(spec))]
+
+    for _ in range(min(prefix_depth, depth)):
+        next_level = []
+        for priority, _, cost, expr, expr_schema, state in level:
+            prev = kind(expr[-1]) if expr else START
+            for op, schema in expr_schema.rules(spec):
+                if not is_canonical_extension(expr, op):
+                    continue
+                next_expr = expr + [op]
+                next_state = prefilter.transfer(state, op)
+                domain = prefilter.reject(next_state, schema)
+                if domain == "leaves":
+                    continue
+                score = priority
+                if domain is None:
+                    expr_str, score = spec.verify(next_expr)
+                    if score is None:
+                        score = priority
+                    if expr_str is not None:
+                        results.append(expr_str)
+                next_cost = cost + priors.cost(prev, kind(op))
+                next_level.append(
+                    (score, len(next_expr), next_cost, next_expr, schema, next_state)
+                )
+        level = next_level
+
+    if len(level) > 0 and len(level[0][3]) >= depth:
+        return results, []
+    return results, [[entry[:5]] for entry in level]
+
+
+class Coordinator:
+    """
+    Hands out partitions of the search to the workers that connect to address
+    """
+
+    def __init__(
+        self,
+        examples: list[dict],
+        constants: list = [],
+        depth: int = 3,
+        max_results: int = 1,
+        address=("localhost", 0),
+        authkey: Optional[bytes] = None,
+        prefix_depth: int = 1,
+        segment: Optional[str] = None,
+        worker_timeout: float = WORKER_TIMEOUT,
+    ):
+        self.examples = examples
+        self.constants = constants
+        self.depth = depth
+        self.max_results = max_results
+        # Random unless workers outside of this process tree need it
+        self.authkey = os.urandom(32) if authkey is None else authkey
+        self.prefix_depth = prefix_depth
+        # Shared segment holding the examples and constants
+        self.segment = segment
+        self.worker_timeout = worker_timeout
+        # Partitions handed out and frontiers donated by busy workers
+        self.stats = Counter()
+        self.sock = socket.create_server(address)
+
+    @property
+    def address(self):
+        return self.sock.getsockname()[:2]
+
+    def accept(self, stop: bool = False) -> Optional[Connection]:
+        """
+        Accept a worker and send it the spec, or stop it if stop is True
+        Returns None if the worker failed to join
+        """
+        sock, _ = self.sock.accept()
+        conn = Connection(sock.detach())
+        try:
+            # Same handshake as multiprocessing.connection.Listener
+            deliver_challenge(conn, self.authkey)
+            answer_challenge(conn, self.authkey)
+            _, segment = conn.recv()
+            if stop:
+                conn.send(("stop",))
+            elif segment is not None and segment == self.segment:
+                conn.send(("spec", None, None, self.depth, self.max_results))
+            else:
+                conn.send(
+                    (
+                        "spec",
+                        self.examples,
+                        self.constants,
+                        self.depth,
+                        self.max_results,
+                    )
+                )
+        except (AuthenticationError, EOFError, OSError):
+            conn.close()
+            return None
+        return conn
+
+    def run(self, processes: list[Process] = []) -> list[str]:
+        """
+        Run the search until max_results expressions are found or every
+        partition is exhausted
+        processes are the local workers
+        Raises NoWorkers if partitions are left but no worker is connected
+        for worker_timeout seconds, or once every local worker exited
+        """
+        spec = Spec(self.examples, self.constants)
+        input_schema = get_schema([example["input"] for example in self.examples])
+        results, partitions = partition(
+            spec, input_schema, self.depth, self.prefix_depth
+        )
+        # Most promising prefixes first
+        queue = deque(sorted(partitions, key=lambda frontier: frontier[0][:3]))
+
+        # Per connected worker the partition it works on, None when idle and
+        # an empty frontier until it first asks for work
+        assigned: dict[Connection, Optional[Frontier]] = {}
+        # Workers with an outstanding steal request
+        stealing: set[Connection] = set()
+        last_connected = time.monotonic()
+
+        try:
+            while len(results) < self.max_results:
+                idle = all(work is None for work in assigned.values())
+                if not queue and not stealing and idle:
+                    break
+                if assigned:
+                    last_connected = time.monotonic()
+                elif (
+                    processes and not any(process.is_alive() for process in processes)
+                ) or time.monotonic() - last_connected > self.worker_timeout:
+                    raise NoWorkers()
+
+                for ready in wait([self.sock] + list(assigned), timeout=0.05):
+                    if ready is self.sock:
+                        conn = self.accept()
+                        if conn is not None:
+                            assigned[conn] = []
+                        continue
+
+                    try:
+                        message = ready.recv()
+                    except (EOFError, OSError):
+                        # Redo the partition of a lost worker
+                        if assigned[ready]:
+                            queue.append(assigned[ready])
+                        del assigned[ready]
+                        stealing.discard(ready)
+                        continue
+
+                    if message[0] == "ready":
+                        assigned[ready] = None
+                    elif message[0] == "result":
+                        if message[1] not in results:
+                            results.append(message[1])
+                    elif message[0] == "donate":
+                        stealing.discard(ready)
+                        if message[1]:
+                            self.stats["donated"] += 1
+                            queue.append(message[1])
+
+                for conn, work in assigned.items():
+                    if work is None and queue:
+                        assigned[conn] = queue.popleft()
+                        conn.send(("work", assigned[conn]))
+                        self.stats["handed"] += 1
+
+                if not queue and None in assigned.values():
+                    for conn, work in assigned.items():
+                        if work and conn not in stealing:
+                            conn.send(("steal",))
+                            stealing.add(conn)
+                            break
+        finally:
+            for conn in assigned:
+                try:
+                    conn.send(("stop",))
+                    conn.close()
+                except OSError:
+                    pass
+            self.stop(processes)
+            self.sock.close()
+
+        return results[: self.max_results]
+
+    def stop(self, processes: list[Process]):
+        """
+        Stop the local workers that connect after the search, until every
+        one of them exited or for at most STOP_TIMEOUT seconds
+        """
+        deadline = time.monotonic() + STOP_TIMEOUT
+        while time.monotonic() < deadline and any(
+            process.is_alive() for process in processes
+        ):
+            if wait([self.sock], timeout=0.05):
+                conn = self.accept(stop=True)
+                if conn is not None:
+                    conn.close()
+
+
+class NoWorkers(Exception):
+    """
+    Partitions are left but no worker is there to search them
+    """
+
+
+class StopSearch(Exception):
+    pass
+
+
+def run_worker(address, authkey: Optional[bytes] = None, segment: Optional[str] = None):
+    """
+    Serve partitions of a coordinator's search until told to stop
+    The key defaults to JQSYN_AUTHKEY, raises ValueError if it is not set
+    The examples are read from the shared segment if the coordinator owns it
+    """
+    if authkey is None:
+        authkey = env_authkey()
+        if authkey is None:
+            raise ValueError(f"{AUTHKEY_VARIABLE} is not set")
+    try:
+        conn = Client(address, authkey=authkey)
+        conn.send(("join", segment))
+        message = conn.recv()
+    except AuthenticationError:
+        raise
+    except (EOFError, OSError):
+        # The search is already over
+        return
+    if message[0] == "stop":
+        conn.close()
+        return
+    _, examples, constants, depth, max_results = message
+    if examples is None:
+        examples, constants = load(segment)
+    spec = Spec(examples, constants)
+    input_schema = get_schema([example["input"] for example in examples])
+    prefilter = AbstractFilter(spec)
+    polls = 0
+
+    def poll(worklist: list):
+        nonlocal polls
+        polls += 1
+        if polls % POLL_INTERVAL != 0 or not conn.poll():
+            return
+        message = conn.recv()
+        if message[0] == "stop":
+            raise StopSearch()
+        if message[0] == "steal":
+            # Donate every other entry, leaving a valid heap of the rest
+            stolen = worklist[1::2]
+            worklist[:] = worklist[0::2]
+            heapify(worklist)
+            conn.send(("donate", snapshot(stolen)))
+
+    try:
+        while True:
+            conn.send(("ready",))
+            message = conn.recv()
+            while message[0] == "steal":
+                conn.send(("donate", []))
+                message = conn.recv()
+            if message[0] == "stop":
+                return
+
+            resume = Checkpoint(
+                examples, constants, depth, max_results, "original", message[1], []
+            )
+            try:
+                bottom_up(
+                    spec,
+                    input_schema,
+                    depth,
+                    max_results,
+                    prefilter=prefilter,
+                    resume=resume,
+                    poll=poll,
+                    on_result=lambda expr_str: conn.send(("result", expr_str)),
+                )
+            except OutOfDepth:
+                pass
+    except (StopSearch, EOFError, OSError):
+        return
+    finally:
+        conn.close()
+
+
+def run_local_worker(listener: socket.socket, address, authkey: bytes, segment: str):
+    """
+    run_worker in a process forked from the coordinator, closing first the
+    copy of its listening socket
+    """
+    listener.close()
+    run_worker(address, authkey, segment)
+
+
+def distributed_synthesis(
+    examples: list[dict],
+    constants: list = [],
+    depth: int = 3,
+    max_results: int = 1,
+    address=("localhost", 0),
+    authkey: Optional[bytes] = None,
+    workers: int = 0,
+    prefix_depth: int = 1,
+) -> list[str]:
+    """
+    multi_synthesis with the enumerative search spread over workers
+    workers local worker processes are started, others may connect to address
+    with authkey (a random key is used if it is None)
+    The search runs locally if no worker is left to connect (see Coordinator)
+    Raises ValueError if no worker can connect at all
+    """
+    if workers < 1 and address[1] == 0:
+        raise ValueError("Remote workers need a fixed port to connect to")
+    shared = SharedExamples(examples, constants) if workers > 0 else None
+    try:
+        coordinator = Coordinator(
+            examples,
+            constants,
+            depth,
+            max_results,
+            address,
+            authkey,
+            prefix_depth,
+            segment=None if shared is None else shared.name,
+        )
+        context = get_context("fork")
+        processes = [
+            context.Process(
+                target=run_local_worker,
+                args=(
+                    coordinator.sock,
+                    coordinator.address,
+                    coordinator.authkey,
+                    shared.name,
+                ),
+            )
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            results = coordinator.run(processes)
+        except NoWorkers:
+            return multi_synthesis(examples, constants, depth, max_results)
+        finally:
+            for process in processes:
+                process.join(STOP_TIMEOUT)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+    finally:
+        if shared is not None:
+            shared.close()
+
+    if results:
+        return results
+    return union_fallback(examples, constants, depth)
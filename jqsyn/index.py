@@ -0,0 +1,194 @@
+"""
+Precomputed enumeration index
+
+The canonical pipelines up to some depth are enumerated once over a fixed
+set of input documents and the hash of every pipeline's output on every
+input is stored on disk. A spec whose example inputs are among the indexed
+ones and whose constants are the ones of the index is then answered by
+looking up the expected output hashes.
+
+File layout (all integers big endian)
+- header:   magic, number of inputs, number of pipelines, constants length
+- constants: JSON encoded constants the pipelines were enumerated with
+- inputs:   hash of every input
+- outputs:  per pipeline, the hash of its output on every input
+- keys:     (input, output hash, pipeline) records sorted by input and hash
+- offsets:  per pipeline, the offset of its expression in the strings
+- strings:  utf-8 encoded expressions
+Pipelines are numbered in (length, prior cost) order, so smaller numbers
+rank first.
+"""
+
+import json
+import mmap
+import struct
+from bisect import bisect_left
+from typing import Optional
+
+from jqsyn.merkle import merkle_hash, DIGEST_SIZE
+from jqsyn.pipeline import construct
+from jqsyn.schema import get_schema
+from jqsyn.spec import try_run, Spec
+from jqsyn.synthesize import enumerate_pipelines
+
+MAGIC = b"JQSYNIX2"
+HEADER = struct.Struct(">8sIII")
+KEY = struct.Struct(f">I{DIGEST_SIZE}sI")
+OFFSET = struct.Struct(">Q")
+
+# Output hash of pipelines that fail on an input
+FAILED = bytes(DIGEST_SIZE)
+
+
+def build(inputs: list, constants: list, depth: int, path: str) -> int:
+    """
+    Index the pipelines up to depth over the inputs, returns their number
+    """
+    # Outputs are unknown, only the constants of the spec matter
+    spec = Spec([{"input": value, "output": []} for value in inputs], constants)
+    pipelines = sorted(
+        enumerate_pipelines(spec, get_schema(inputs), depth),
+        key=lambda pipeline: (len(pipeline[0]), pipeline[2]),
+    )
+
+    outputs = []
+    keys = []
+    for i, (expr, _, _) in enumerate(pipelines):
+        expr_str = construct(expr)
+        row = []
+        for j, value in enumerate(inputs):
+            output = try_run(expr_str, value)
+            output_hash = FAILED if output is None else merkle_hash(output)
+            row.append(output_hash)
+            keys.append((j, output_hash, i))
+        outputs.append(b"".join(row))
+    keys.sort()
+
+    strings = [construct(expr).encode() for expr, _, _ in pipelines]
+    encoded_constants = json.dumps(constants).encode()
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(inputs), len(pipelines), len(encoded_constants)))
+        f.write(encoded_constants)
+        f.write(b"".join(merkle_hash(value) for value in inputs))
+        f.write(b"".join(outputs))
+        f.write(b"".join(KEY.pack(*key) for key in keys))
+        offset = 0
+        for string in strings + [b""]:
+            f.write(OFFSET.pack(offset))
+            offset += len(string)
+        f.write(b"".join(strings))
+
+    return len(pipelines)
+
+
+class Index:
+    """
+    Read-only, memory mapped view of an index file
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.num_inputs, self.num_pipelines, constants_size = HEADER.unpack_from(
+            self.buf
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a jqsyn index")
+        self.constants = json.loads(
+            self.buf[HEADER.size : HEADER.size + constants_size]
+        )
+        self.constants_key = constants_key(self.constants)
+
+        self.inputs_offset = HEADER.size + constants_size
+        self.outputs_offset = self.inputs_offset + self.num_inputs * DIGEST_SIZE
+        self.keys_offset = (
+            self.outputs_offset + self.num_pipelines * self.num_inputs * DIGEST_SIZE
+        )
+        self.offsets_offset = (
+            self.keys_offset + self.num_inputs * self.num_pipelines * KEY.size
+        )
+        self.strings_offset = (
+            self.offsets_offset + (self.num_pipelines + 1) * OFFSET.size
+        )
+
+        self.input_indices = {self.input_hash(j): j for j in range(self.num_inputs)}
+
+    def close(self):
+        self.buf.close()
+
+    def input_hash(self, j: int) -> bytes:
+        start = self.inputs_offset + j * DIGEST_SIZE
+        return self.buf[start : start + DIGEST_SIZE]
+
+    def output_hash(self, i: int, j: int) -> bytes:
+        start = self.outputs_offset + (i * self.num_inputs + j) * DIGEST_SIZE
+        return self.buf[start : start + DIGEST_SIZE]
+
+    def key(self, k: int) -> tuple[int, bytes, int]:
+        return KEY.unpack_from(self.buf, self.keys_offset + k * KEY.size)
+
+    def expression(self, i: int) -> str:
+        start, end = struct.unpack_from(
+            ">QQ", self.buf, self.offsets_offset + i * OFFSET.size
+        )
+        return self.buf[
+            self.strings_offset + start : self.strings_offset + end
+        ].decode()
+
+    def lookup(
+        self, examples: list[dict], constants: list, max_results: int = 1
+    ) -> Optional[list[str]]:
+        """
+        Return the best ranked indexed expressions satisfying the examples
+        Returns None if some example input is not indexed, or if the index
+        was built with other constants (its pipelines are not the search
+        space of the spec)
+        """
+        if constants_key(constants) != self.constants_key:
+            return None
+        indices = []
+        for example in examples:
+            j = self.input_indices.get(merkle_hash(example["input"]))
+            if j is None:
+                return None
+            indices.append((j, merkle_hash(example["output"])))
+        if not indices:
+            return None
+
+        j, expected = indices[0]
+        keys = KeyView(self)
+        k = bisect_left(keys, (j, expected))
+        matches = []
+        while k < len(keys):
+            key_j, output_hash, i = self.key(k)
+            if (key_j, output_hash) != (j, expected):
+                break
+            if all(self.output_hash(i, other) == h for other, h in indices[1:]):
+                matches.append(i)
+            k += 1
+
+        matches.sort()
+        return [self.expression(i) for i in matches[:max_results]]
+
+
+def constants_key(constants: list) -> list[bytes]:
+    """
+    Key of a list of constants that does not depend on their order
+    """
+    return sorted(merkle_hash(constant) for constant in constants)
+
+
+class KeyView:
+    """
+    Sequence of the (input, output hash) prefixes of the key records
+    """
+
+    def __init__(self, index: Index):
+        self.index = index
+
+    def __len__(self):
+        return self.index.num_inputs * self.index.num_pipelines
+
+    def __getitem__(self, k: int) -> tuple[int, bytes]:
+        return self.index.key(k)[:2]
@@ -0,0 +1,67 @@
+"""
+Loading of specification files
+
+The top level members of the file are decoded one at a time by the C
+decoder of the json module. Members that are not requested are dropped as
+soon as they are decoded, and the strings of the requested ones are
+interned (see jqsyn.compact), so the peak memory is below that of json.load
+while the decoding runs at the same speed apart from the interning hook.
+
+Members are still decoded in full: skipping them undecoded needs a
+tokenizer in Python, which is several times slower than decoding them.
+"""
+
+import json
+import re
+
+from jqsyn.compact import Interner
+
+_DECODER = json.JSONDecoder()
+_WS = re.compile(r"[ \t\n\r]*")
+
+
+def load_spec(path: str, keys=("examples", "constants")) -> dict:
+    """
+    Load the requested top level members of a specification file
+    Raises ValueError if the file is not a JSON object
+    """
+    with open(path, "r") as f:
+        text = f.read()
+    return _load(text, frozenset(keys))
+
+
+def _load(text: str, keys) -> dict:
+    decoder = json.JSONDecoder(object_pairs_hook=Interner())
+    data = {}
+
+    pos = _skip_ws(text, _expect(text, _skip_ws(text, 0), "{"))
+    if text[pos : pos + 1] != "}":
+        while True:
+            if text[pos : pos + 1] != '"':
+                raise ValueError(f"Expected a member name at offset {pos}")
+            key, pos = _DECODER.raw_decode(text, pos)
+            pos = _skip_ws(text, _expect(text, _skip_ws(text, pos), ":"))
+            if key in keys:
+                data[key], pos = decoder.raw_decode(text, pos)
+            else:
+                _, pos = _DECODER.raw_decode(text, pos)
+
+            pos = _skip_ws(text, pos)
+            if text[pos : pos + 1] == "}":
+                break
+            pos = _skip_ws(text, _expect(text, pos, ","))
+
+    pos = _skip_ws(text, pos + 1)
+    if pos != len(text):
+        raise ValueError(f"Extra data at offset {pos}")
+    return data
+
+
+def _skip_ws(text: str, pos: int) -> int:
+    return _WS.match(text, pos).end()
+
+
+def _expect(text: str, pos: int, token: str) -> int:
+    if text[pos : pos + 1] != token:
+        raise ValueError(f"Expected {token!r} at offset {pos}")
+    return pos + 1
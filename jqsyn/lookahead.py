@@ -0,0 +1,269 @@
+"""
+Search with a one-operator lookahead on the expected outputs
+
+The pipelines up to depth - 1 are expanded depth first, keeping the output
+stream of each on every example input along the current path, so that a
+pipeline is run by applying its last operator to the stream of its parent.
+The expansion restarts for every candidate length, to verify the candidates
+one length at a time while holding only depth streams in memory. Before a candidate
+is verified, its last operator is checked against the expected outputs: for
+the operators that lose the order of their input, a witness function maps
+the outputs to a key shared by every stream the operator could have been
+applied to.
+- sort, sort_by(f):  each list is a permutation of the intermediate list,
+                     keyed by the multiset of its elements
+- group_by(f):       the groups concatenate to a permutation of the list
+- keys:              the intermediate is a dict with exactly those keys (or
+                     a list with those indices)
+The other operators (.[], .index, select, all, any) are cheap to apply to
+the intermediate stream in Python, their key is the hash of the output.
+
+A pipeline is only extended into a candidate by the operators of its schema
+whose key matches the expected one, and only those candidates are run
+through pyjq. The lookahead covers the last operator only: the witnesses
+give a key, not the intermediate values, so they can not be applied again
+to grow a backward frontier, and the search is not split into two searches
+of half the depth. It covers the same pipelines as bottom_up to depth, but
+compiles jq expressions only for the candidates that pass the keys.
+"""
+
+from functools import lru_cache
+from hashlib import blake2b
+from typing import Optional
+
+from jqsyn.merkle import merkle_hash, DIGEST_SIZE
+from jqsyn.pipeline import identity, Expr, Operator
+from jqsyn.pipeline import All, Any, ForEach, Keys, Sort
+from jqsyn.pipeline import GroupBy, ObjectIndex, SortBy
+from jqsyn.pipeline import Select, EqualityPred
+from jqsyn.priors import default_grammar, kind, START
+from jqsyn.rewrite import is_canonical_extension
+from jqsyn.schema import get_schema
+from jqsyn.spec import Spec
+from jqsyn.synthesize import OutOfDepth
+
+WITNESSES: dict[type, str] = {
+    Sort: "sort",
+    SortBy: "sort",
+    GroupBy: "group_by",
+    Keys: "keys",
+}
+
+
+class Error(Exception):
+    """
+    The operator fails on the stream in jq
+    """
+
+
+def multiset_hash(values: list) -> bytes:
+    """
+    Hash of a list that does not depend on the order of its elements
+    """
+    digests = sorted(merkle_hash(value) for value in values)
+    return blake2b(b"".join(digests), digest_size=DIGEST_SIZE).digest()
+
+
+def index(value, key: str):
+    if isinstance(value, dict):
+        return value.get(key)
+    if value is None:
+        return None
+    raise Error()
+
+
+def truthy(value) -> bool:
+    return value is not None and value is not False
+
+
+def apply(op: Operator, stream: list) -> Optional[list]:
+    """
+    Output stream of op on stream, None if op is not simulated
+    """
+    if isinstance(op, ForEach):
+        output = []
+        for value in stream:
+            if isinstance(value, list):
+                output.extend(value)
+            elif isinstance(value, dict):
+                output.extend(value.values())
+            else:
+                raise Error()
+        return output
+    if isinstance(op, ObjectIndex):
+        return [index(value, op.index) for value in stream]
+    if isinstance(op, Select) and isinstance(op.pred, EqualityPred):
+        expected = merkle_hash(op.pred.value)
+        return [
+            value
+            for value in stream
+            if merkle_hash(index(value, op.pred.object_index.index)) == expected
+        ]
+    if isinstance(op, (All, Any)):
+        if not all(isinstance(value, list) for value in stream):
+            raise Error()
+        reduce = all if isinstance(op, All) else any
+        return [reduce(truthy(elem) for elem in value) for value in stream]
+    return None
+
+
+@lru_cache(maxsize=None)
+def compile_op(op_str: str):
+    # Compiling dominates the cost of running a jq expression
+    import pyjq
+
+    return pyjq.compile(op_str)
+
+
+def step(op: Operator, stream: list) -> list:
+    """
+    Output stream of op on stream
+    Raises Error if op fails on the stream
+    """
+    import pyjq
+
+    script = compile_op(op.jq_repr())
+    try:
+        return [output for value in stream for output in script.all(value)]
+    except pyjq.ScriptRuntimeError:
+        raise Error()
+
+
+def forward_key(op: Operator, stream: list) -> Optional[bytes]:
+    """
+    Key of op applied to stream, None if op is neither witnessed nor
+    simulated
+    Raises Error if op fails on the stream
+    """
+    witness = WITNESSES.get(type(op))
+    if witness is None:
+        output = apply(op, stream)
+        return None if output is None else merkle_hash(output)
+
+    digests = []
+    for value in stream:
+        if witness in ["sort", "group_by"] and isinstance(value, list):
+            digests.append(multiset_hash(value))
+        elif witness == "keys" and isinstance(value, dict):
+            digests.append(merkle_hash(sorted(value)))
+        elif witness == "keys" and isinstance(value, list):
+            digests.append(merkle_hash(list(range(len(value)))))
+        else:
+            raise Error()
+    return blake2b(b"".join(digests), digest_size=DIGEST_SIZE).digest()
+
+
+def backward_key(witness: str, stream: list) -> Optional[bytes]:
+    """
+    Key of the streams a witnessed operator outputs stream on, None if it
+    can not output it
+    """
+    digests = []
+    for value in stream:
+        if not isinstance(value, list):
+            return None
+        if witness == "sort":
+            digests.append(multiset_hash(value))
+        elif witness == "group_by":
+            if not all(isinstance(group, list) and group for group in value):
+                return None
+            digests.append(multiset_hash([elem for group in value for elem in group]))
+        elif witness == "keys":
+            digests.append(merkle_hash(value))
+    return blake2b(b"".join(digests), digest_size=DIGEST_SIZE).digest()
+
+
+def lookahead_synthesis(
+    examples: list[dict], constants: list = [], depth: int = 3, max_results: int = 1
+) -> list[str]:
+    """
+    Returns jq parse expression strings that satisfy the input-output examples,
+    shortest and most likely under the priors first
+    Raises OutOfDepth if there is none up to depth
+    """
+    spec = Spec(examples, constants)
+    priors = default_grammar()
+    inputs = [example["input"] for example in examples]
+
+    # Backward half: the keys the last operator must produce
+    expected = {}
+    for witness in set(WITNESSES.values()):
+        keys = tuple(backward_key(witness, example["output"]) for example in examples)
+        if None not in keys:
+            expected[witness] = keys
+
+    results = []
+    # (cost, expr) of the candidates one operator longer than the pipelines
+    # expanded so far
+    pending = [(0.0, identity())]
+
+    def flush() -> bool:
+        """
+        Verify the pending candidates, returns whether max_results are found
+        """
+        pending.sort(key=lambda candidate: candidate[0])
+        for _, expr in pending:
+            expr_str, _ = spec.verify(expr)
+            if expr_str is not None and expr_str not in results:
+                results.append(expr_str)
+                if len(results) == max_results:
+                    return True
+        pending.clear()
+        return False
+
+    def extend(expr: Expr, expr_schema, cost: float, streams: list, remaining: int):
+        """
+        Add the candidates remaining + 1 operators longer than expr to pending
+        """
+        try:
+            rules = expr_schema.rules(spec)
+        except NotImplementedError:
+            return
+        # Keys of the witnessed extensions, computed once per witness
+        witness_keys = {}
+        prev = kind(expr[-1]) if expr else START
+        for op, schema in rules:
+            if not is_canonical_extension(expr, op):
+                continue
+            next_expr = expr + [op]
+            next_cost = cost + priors.cost(prev, kind(op))
+            if remaining > 0:
+                try:
+                    next_streams = [step(op, stream) for stream in streams]
+                except Error:
+                    continue
+                extend(next_expr, schema, next_cost, next_streams, remaining - 1)
+                continue
+
+            witness = WITNESSES.get(type(op))
+            if witness is None:
+                target = tuple(spec.output_hashes)
+            elif witness in expected:
+                target = expected[witness]
+            else:
+                continue
+            try:
+                if witness is None:
+                    keys = tuple(forward_key(op, stream) for stream in streams)
+                else:
+                    if witness not in witness_keys:
+                        witness_keys[witness] = tuple(
+                            forward_key(op, stream) for stream in streams
+                        )
+                    keys = witness_keys[witness]
+            except Error:
+                continue
+            if None in keys or keys == target:
+                pending.append((next_cost, next_expr))
+
+    # The pipelines are expanded depth first from scratch for every length,
+    # so only the streams along one path are held at a time
+    input_schema = get_schema(inputs)
+    for length in range(depth):
+        if flush():
+            return results
+        extend(identity(), input_schema, 0.0, [[value] for value in inputs], length)
+
+    if not flush() and not results:
+        raise OutOfDepth(depth)
+    return results
@@ -0,0 +1,57 @@
+"""
+Merkle hashing of JSON values
+
+Every JSON value is hashed bottom up: scalars are hashed from a type tag and
+their encoding, lists from the ordered hashes of their elements and
+dictionaries from the hashes of their (key, value) pairs in key order. Two
+values have the same hash iff they are structurally equal JSON values (modulo
+hash collisions), so the hash doubles as a cache key.
+"""
+
+from hashlib import blake2b
+from typing import Optional
+
+DIGEST_SIZE = 16
+
+NULL_HASH = blake2b(b"n", digest_size=DIGEST_SIZE).digest()
+TRUE_HASH = blake2b(b"t", digest_size=DIGEST_SIZE).digest()
+FALSE_HASH = blake2b(b"f", digest_size=DIGEST_SIZE).digest()
+
+
+def merkle_hash(value, subtrees: Optional[set] = None) -> bytes:
+    """
+    Return the structural hash of a JSON value
+    If subtrees is given, the hashes of all the subtrees are added to it
+    """
+    if value is None:
+        digest = NULL_HASH
+    elif value is True:
+        digest = TRUE_HASH
+    elif value is False:
+        digest = FALSE_HASH
+    elif isinstance(value, str):
+        digest = blake2b(b"s" + value.encode(), digest_size=DIGEST_SIZE).digest()
+    elif isinstance(value, int):
+        digest = blake2b(b"i%d" % value, digest_size=DIGEST_SIZE).digest()
+    elif isinstance(value, float):
+        # jq does not distinguish 2 from 2.0
+        if value.is_integer():
+            return merkle_hash(int(value), subtrees)
+        digest = blake2b(b"r" + repr(value).encode(), digest_size=DIGEST_SIZE).digest()
+    elif isinstance(value, list):
+        h = blake2b(b"l", digest_size=DIGEST_SIZE)
+        for elem in value:
+            h.update(merkle_hash(elem, subtrees))
+        digest = h.digest()
+    elif isinstance(value, dict):
+        h = blake2b(b"o", digest_size=DIGEST_SIZE)
+        for key in sorted(value):
+            h.update(merkle_hash(key))
+            h.update(merkle_hash(value[key], subtrees))
+        digest = h.digest()
+    else:
+        raise TypeError(f"Not a JSON value: {value!r}")
+
+    if subtrees is not None:
+        subtrees.add(digest)
+    return digest
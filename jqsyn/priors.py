@@ -0,0 +1,178 @@
+"""
+Learned operator priors
+
+A bigram grammar over operator kinds, trained on the expressions of
+successful syntheses. The cost of appending an operator to a pipeline is
+its negative log probability given the preceding operator, which bottom_up
+uses to break ties between equally scored candidates.
+"""
+
+import json
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+from math import log2
+from typing import Optional
+
+from jqsyn.pipeline import Operator
+from jqsyn.pipeline import All, Any, ForEach, Keys, Sort
+from jqsyn.pipeline import GroupBy, ObjectIndex, SortBy
+from jqsyn.pipeline import Select
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "priors.json")
+
+# Kind of the (missing) operator before the first one
+START = "^"
+
+KINDS = [
+    op.__name__
+    for op in [All, Any, ForEach, GroupBy, Keys, ObjectIndex, Select, Sort, SortBy]
+]
+
+_TERMS = [
+    (re.compile(r"\.\[\]"), "ForEach"),
+    (re.compile(r"\.[A-Za-z_][A-Za-z0-9_]*"), "ObjectIndex"),
+    (re.compile(r"group_by\(.*\)$"), "GroupBy"),
+    (re.compile(r"sort_by\(.*\)$"), "SortBy"),
+    (re.compile(r"select\(.*\)$"), "Select"),
+    (re.compile(r"sort$"), "Sort"),
+    (re.compile(r"keys$"), "Keys"),
+    (re.compile(r"all$"), "All"),
+    (re.compile(r"any$"), "Any"),
+]
+
+
+def kind(op: Operator) -> str:
+    return type(op).__name__
+
+
+def parse_kinds(expr_str: str) -> Optional[list[str]]:
+    """
+    Return the operator kinds of a jq expression, or None if it uses
+    constructs that are not pipeline operators
+    """
+    kinds = []
+    for term in split_pipes(expr_str):
+        term = term.strip()
+        if term == ".":
+            continue
+        while term:
+            for pattern, term_kind in _TERMS:
+                match = pattern.match(term)
+                if match:
+                    kinds.append(term_kind)
+                    term = term[match.end() :]
+                    # .foo[] is .foo | .[]
+                    if term.startswith("[]"):
+                        term = "." + term
+                    break
+            else:
+                return None
+    return kinds
+
+
+def pipelines(expr_str: str) -> list[list[str]]:
+    """
+    Return the operator kinds of every pipeline in an expression, looking
+    inside object and array constructions
+    """
+    expr_str = expr_str.strip()
+    if (expr_str[:1], expr_str[-1:]) in [("{", "}"), ("[", "]")] and len(
+        split_top(expr_str, "|")
+    ) == 1:
+        result = []
+        for part in split_top(expr_str[1:-1], ","):
+            if expr_str[0] == "{":
+                if ":" not in part:
+                    continue
+                part = part.split(":", 1)[1]
+            result.extend(pipelines(part))
+        return result
+
+    kinds = parse_kinds(expr_str)
+    return [] if kinds is None else [kinds]
+
+
+def split_pipes(expr_str: str) -> list[str]:
+    return split_top(expr_str, "|")
+
+
+def split_top(expr_str: str, sep: str) -> list[str]:
+    """
+    Split an expression at the separators outside of brackets and strings
+    """
+    terms = []
+    depth = 0
+    in_string = False
+    start = 0
+    for i, c in enumerate(expr_str):
+        if in_string:
+            if c == '"' and expr_str[i - 1] != "\\":
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in "([{":
+            depth += 1
+        elif c in ")]}":
+            depth -= 1
+        elif c == sep and depth == 0:
+            terms.append(expr_str[start:i])
+            start = i + 1
+    terms.append(expr_str[start:])
+    return terms
+
+
+class Grammar:
+    """
+    Bigram model over operator kinds with add-one smoothing
+    """
+
+    def __init__(self, bigrams: Optional[dict[str, dict[str, int]]] = None):
+        self.bigrams = {prev: Counter(nexts) for prev, nexts in (bigrams or {}).items()}
+        self._costs = {}
+
+    def train(self, kinds: list[str]):
+        for prev, next in zip([START] + kinds, kinds):
+            self.bigrams.setdefault(prev, Counter())[next] += 1
+        self._costs.clear()
+
+    def cost(self, prev: str, next: str) -> float:
+        """
+        Negative log probability of next following prev
+        """
+        key = (prev, next)
+        if key not in self._costs:
+            counts = self.bigrams.get(prev, Counter())
+            total = sum(counts.values()) + len(KINDS)
+            self._costs[key] = -log2((counts[next] + 1) / total)
+        return self._costs[key]
+
+    def save(self, path: str = DEFAULT_PATH):
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "bigrams": {
+                        prev: dict(sorted(nexts.items()))
+                        for prev, nexts in sorted(self.bigrams.items())
+                    }
+                },
+                f,
+                indent=4,
+            )
+            f.write("\n")
+
+    @staticmethod
+    def load(path: str = DEFAULT_PATH) -> "Grammar":
+        with open(path, "r") as f:
+            return Grammar(json.load(f)["bigrams"])
+
+
+@lru_cache(maxsize=None)
+def default_grammar() -> Grammar:
+    """
+    Grammar shipped with the package, or a uniform one if there is none
+    """
+    if os.path.exists(DEFAULT_PATH):
+        return Grammar.load(DEFAULT_PATH)
+    return Grammar()
@@ -0,0 +1,125 @@
+"""
+Input projection
+
+Drops the parts of the example inputs that cannot contribute to the
+expected outputs. A dictionary field is kept if, in some example, its value
+contains a leaf that occurs in an output or among the constants, or if its
+key occurs in an output dictionary. A dictionary one of whose keys occurs
+as an output leaf is kept whole since `keys` may produce it. Paths are
+generalised over list indices and lists are never shortened.
+
+Projection is a heuristic: expressions found on the projected inputs must
+be confirmed on the original ones.
+"""
+
+Path = tuple
+
+# Stand-ins for empty containers, which have no leaves of their own
+EMPTY_LIST = ("[]",)
+EMPTY_DICT = ("{}",)
+
+
+def project(examples: list[dict], constants: list) -> list[dict]:
+    """
+    Return the examples with their inputs projected
+    Returns the examples unchanged when nothing can be dropped or when some
+    input has nothing relevant at all
+    """
+    leaves = {leaf(constant) for constant in constants}
+    keys = set()
+    for example in examples:
+        collect(example["output"], leaves, keys)
+
+    keep = set()
+    whole = set()
+    for example in examples:
+        if not relevant(example["input"], (), leaves, keys, keep, whole):
+            return examples
+
+    projected = []
+    pruned = False
+    for example in examples:
+        value = prune(example["input"], (), keep, whole)
+        pruned = pruned or value != example["input"]
+        projected.append({"input": value, "output": example["output"]})
+
+    return projected if pruned else examples
+
+
+def collect(value, leaves: set, keys: set):
+    """
+    Collect the leaves and dictionary keys of an output
+    """
+    if isinstance(value, dict):
+        if not value:
+            leaves.add(EMPTY_DICT)
+        for key, elem in value.items():
+            keys.add(key)
+            collect(elem, leaves, keys)
+    elif isinstance(value, list):
+        if not value:
+            leaves.add(EMPTY_LIST)
+        for elem in value:
+            collect(elem, leaves, keys)
+    else:
+        leaves.add(leaf(value))
+
+
+def relevant(value, path: Path, leaves: set, keys: set, keep: set, whole: set):
+    """
+    Record the relevant paths below value
+    Returns whether value itself is relevant
+    """
+    if isinstance(value, dict):
+        if not value:
+            return EMPTY_DICT in leaves
+
+        found = False
+        for key, elem in value.items():
+            if leaf(key) in leaves:
+                whole.add(path)
+                found = True
+            if relevant(elem, path + (key,), leaves, keys, keep, whole) or key in keys:
+                keep.add(path + (key,))
+                found = True
+        return found
+
+    if isinstance(value, list):
+        if not value:
+            return EMPTY_LIST in leaves
+
+        found = False
+        for elem in value:
+            found = relevant(elem, path + (None,), leaves, keys, keep, whole) or found
+        return found
+
+    return leaf(value) in leaves
+
+
+def leaf(value):
+    """
+    Membership key of a leaf, which keeps true and 1 apart
+    """
+    return (isinstance(value, bool), value)
+
+
+def prune(value, path: Path, keep: set, whole: set):
+    """
+    Drop the dictionary fields that are not on a relevant path
+    """
+    if path in whole:
+        return value
+
+    if isinstance(value, dict):
+        result = {
+            key: prune(elem, path + (key,), keep, whole)
+            for key, elem in value.items()
+            if path + (key,) in keep
+        }
+        # Emptying a dictionary would change its schema
+        return result if result or not value else value
+
+    if isinstance(value, list):
+        return [prune(elem, path + (None,), keep, whole) for elem in value]
+
+    return value
@@ -0,0 +1,91 @@
+"""
+Algebraic rewrites of pipelines
+
+Every rule rewrites a pair of adjacent operators into an equivalent, shorter
+or more ordered sequence:
+- sort | sort                     -> sort
+- keys | sort                     -> keys             (keys is sorted)
+- sort_by(f) | sort               -> sort
+- sort_by(f) | sort_by(f)         -> sort_by(f)
+- sort_by(f) | group_by(f)        -> group_by(f)      (both sorts are stable)
+- sort | all, sort | any          -> all, any
+- select(p) | select(p)           -> select(p)
+- select(q) | select(p)           -> select(p) | select(q)   if p < q
+
+A pipeline is canonical if none of the rules applies to it. Rules only look
+at adjacent pairs, so every prefix of a canonical pipeline is canonical and
+the search can refuse a candidate by looking at its last two operators.
+"""
+
+from typing import Callable, Optional
+
+from jqsyn.pipeline import Operator, Expr
+from jqsyn.pipeline import All, Any, Keys, Sort
+from jqsyn.pipeline import GroupBy, SortBy
+from jqsyn.pipeline import Select
+
+
+def same(a: Operator, b: Operator) -> bool:
+    return a.jq_repr() == b.jq_repr()
+
+
+def same_key(a: Operator, b: Operator) -> bool:
+    return a.object_index.jq_repr() == b.object_index.jq_repr()
+
+
+def rewrite_selects(a: Select, b: Select) -> Optional[Expr]:
+    if same(a, b):
+        return [a]
+    if b.jq_repr() < a.jq_repr():
+        return [b, a]
+    return None
+
+
+REWRITES: dict[tuple[type, type], Callable[[Operator, Operator], Optional[Expr]]] = {
+    (Sort, Sort): lambda a, b: [a],
+    (Keys, Sort): lambda a, b: [a],
+    (SortBy, Sort): lambda a, b: [b],
+    (SortBy, SortBy): lambda a, b: [a] if same(a, b) else None,
+    (SortBy, GroupBy): lambda a, b: [b] if same_key(a, b) else None,
+    (Sort, All): lambda a, b: [b],
+    (Sort, Any): lambda a, b: [b],
+    (Select, Select): rewrite_selects,
+}
+
+
+def rewrite_pair(a: Operator, b: Operator) -> Optional[Expr]:
+    """
+    Return the rewrite of a | b, or None if the pair is canonical
+    """
+    rule = REWRITES.get((type(a), type(b)))
+    if rule is None:
+        return None
+    return rule(a, b)
+
+
+def is_canonical_extension(expr: Expr, op: Operator) -> bool:
+    """
+    Whether expr | op is canonical, given that expr is
+    """
+    return len(expr) == 0 or rewrite_pair(expr[-1], op) is None
+
+
+def is_canonical(expr: Expr) -> bool:
+    return all(rewrite_pair(a, b) is None for a, b in zip(expr, expr[1:]))
+
+
+def canonicalize(expr: Expr) -> Expr:
+    """
+    Return the canonical form of a pipeline
+    """
+    expr = list(expr)
+    i = 0
+    while i + 1 < len(expr):
+        replacement = rewrite_pair(expr[i], expr[i + 1])
+        if replacement is None:
+            i += 1
+        else:
+            expr[i : i + 2] = replacement
+            # The rewrite may enable a rule on the preceding pair
+            i = max(i - 1, 0)
+    return expr
@@ -140,7 +140,7 @@ class DictSchema(Schema):
             if isinstance(schema, StrSchema) or isinstance(schema, AnySchema):
                 for str_const in spec.get_str_constants():
                     ops.append(
-                        (Select(EqualityPred(ObjectIndex(index), str_const), self))
+                        (Select(EqualityPred(ObjectIndex(index), str_const)), self)
                     )
 
         # .[]
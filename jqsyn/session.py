@@ -0,0 +1,96 @@
+"""
+Interactive synthesis sessions
+
+A session enumerates the pipelines once and keeps the ones that satisfy all
+the examples so far, along with the hashes of their outputs on every
+example. A pipeline that fails an example can never satisfy a spec with more
+examples, so adding an example only runs the retained pipelines on it.
+"""
+
+from dataclasses import dataclass
+
+from jqsyn.abstract import AbstractFilter
+from jqsyn.merkle import merkle_hash
+from jqsyn.pipeline import construct, Expr
+from jqsyn.schema import get_schema
+from jqsyn.spec import try_run, Spec
+from jqsyn.synthesize import enumerate_pipelines, multi_synthesis
+
+
+@dataclass
+class Candidate:
+    expr: Expr
+    expr_str: str
+    cost: float
+    # Output hash per example
+    hashes: list[bytes]
+
+
+class Session:
+    def __init__(self, examples: list[dict], constants: list = [], depth: int = 3):
+        self.examples = list(examples)
+        self.constants = constants
+        self.depth = depth
+        self.candidates = None
+
+    def synthesize(self, max_results: int = 1) -> list[str]:
+        """
+        Return the best ranked expressions satisfying all the examples
+        Falls back to multi_synthesis when no enumerated pipeline does
+        """
+        if self.candidates is None:
+            self.candidates = self.enumerate()
+
+        if not self.candidates:
+            return multi_synthesis(
+                self.examples, self.constants, self.depth, max_results
+            )
+        return [candidate.expr_str for candidate in self.candidates[:max_results]]
+
+    def add_example(self, example: dict, max_results: int = 1) -> list[str]:
+        """
+        Add an example and return the new best ranked expressions
+        """
+        self.examples.append(example)
+        if self.candidates is not None:
+            expected = merkle_hash(example["output"])
+            retained = []
+            for candidate in self.candidates:
+                output_hash = evaluate(candidate.expr_str, example["input"])
+                if output_hash == expected:
+                    candidate.hashes.append(output_hash)
+                    retained.append(candidate)
+            self.candidates = retained
+        return self.synthesize(max_results)
+
+    def enumerate(self) -> list[Candidate]:
+        """
+        Enumerate the pipelines satisfying all the examples, best ranked first
+        """
+        spec = Spec(self.examples, self.constants)
+        input_schema = get_schema([example["input"] for example in self.examples])
+        candidates = []
+        for expr, _, cost in enumerate_pipelines(
+            spec, input_schema, self.depth, prefilter=AbstractFilter(spec)
+        ):
+            expr_str = construct(expr)
+            hashes = []
+            for example, expected in zip(self.examples, spec.output_hashes):
+                output_hash = evaluate(expr_str, example["input"])
+                if output_hash != expected:
+                    break
+                hashes.append(output_hash)
+            else:
+                candidates.append(Candidate(expr, expr_str, cost, hashes))
+
+        # Same order as bottom_up gives to expressions with a score of zero
+        candidates.sort(key=lambda candidate: (len(candidate.expr), candidate.cost))
+        return candidates
+
+
+def evaluate(expr_str: str, value):
+    """
+    Return the hash of the output of the expression, None if it fails
+    """
+    output = try_run(expr_str, value)
+    return None if output is None else merkle_hash(output)
@@ -0,0 +1,85 @@
+"""
+Sharing example data with worker processes
+
+The examples and constants are serialised once, with marshal, into a
+shared memory segment. Workers attach to the segment by name and decode it
+once per process, so tasks (and the local workers of jqsyn.distributed)
+only carry the segment name instead of a pickle of the examples.
+
+This saves the pickling and the transfer, not memory: Python objects can
+not live in shared memory, so every worker still holds its own decoded
+copy of the examples, and N workers hold N copies.
+"""
+
+import marshal
+import struct
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional
+
+from jqsyn.spec import Spec
+
+SIZE = struct.Struct(">Q")
+
+# Per process cache of the attached specs by segment name
+_specs: dict[str, Spec] = {}
+
+
+class SharedExamples:
+    """
+    Owner of a shared memory segment holding examples and constants
+    """
+
+    def __init__(self, examples: list[dict], constants: list = []):
+        data = marshal.dumps((examples, constants))
+        self.shm = SharedMemory(create=True, size=SIZE.size + len(data))
+        SIZE.pack_into(self.shm.buf, 0, len(data))
+        self.shm.buf[SIZE.size : SIZE.size + len(data)] = data
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self):
+        """
+        Release the segment, workers must not attach afterwards
+        """
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load(name: str) -> tuple[list[dict], list]:
+    """
+    Decode the examples and constants of a shared segment
+    """
+    # Child processes share the resource tracker of the owner, which
+    # unlinks the segment
+    shm = SharedMemory(name=name)
+    try:
+        (size,) = SIZE.unpack_from(shm.buf, 0)
+        with shm.buf[SIZE.size : SIZE.size + size] as view:
+            return marshal.loads(view)
+    finally:
+        shm.close()
+
+
+def attach(name: str) -> Spec:
+    """
+    Return the spec of a shared segment, decoding it on first use
+    """
+    if name not in _specs:
+        _specs[name] = Spec(*load(name))
+    return _specs[name]
+
+
+def verify_shared(name: str, expr_strs: list[str]) -> list[tuple[Optional[str], int]]:
+    """
+    Worker task: verify candidate expressions against a shared spec
+    """
+    spec = attach(name)
+    return [spec.verify_str(expr_str) for expr_str in expr_strs]
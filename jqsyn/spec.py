@@ -1,11 +1,27 @@
 """
 Specification
+
+Staged verification: for a pipeline of the form .a | .b | .[] | rest, jq
+runs rest on every element of the array at .a.b independently, so running
+it on the first elements of the array outputs a prefix of the full output.
+When that array has at least LARGE_ARRAY elements, the pipeline is first
+run on an input where it is cut to SAMPLE_SIZE elements, and is only run on
+the full input if its output is a prefix of the expected one. A sort or
+sort_by before the .[] only permutes the elements, the output on the sample
+must then be contained in the expected one as a multiset.
+
+The output on the sample does not tell how much of the expected output the
+pipeline extracts, so candidates rejected there get no score and inherit the
+priority of their parent, like those rejected by the abstract filter.
 """
 
+from collections import Counter
 from typing import Dict, Optional
-from jqsyn.pipeline import construct, Expr
+from jqsyn.pipeline import construct, Expr, ForEach, ObjectIndex, Sort, SortBy
+from jqsyn.merkle import merkle_hash
 
-import pyjq
+LARGE_ARRAY = 1000
+SAMPLE_SIZE = 64
 
 
 def flatten(data) -> list:
@@ -24,16 +40,89 @@ def flatten(data) -> list:
     return values
 
 
+def run(expr_str: str, value) -> list:
+    """
+    Run a jq expression, returning its output stream
+    """
+    # Imported on first use, loading pyjq takes longer than the rest of jqsyn
+    import pyjq
+
+    return pyjq.all(expr_str, value)
+
+
+def try_run(expr_str: str, value) -> Optional[list]:
+    """
+    Run a jq expression, returning None if it fails at runtime
+    """
+    import pyjq
+
+    try:
+        return pyjq.all(expr_str, value)
+    except pyjq.ScriptRuntimeError:
+        return None
+
+
+def sample_path(expr: Expr) -> Optional[tuple[tuple[str, ...], bool]]:
+    """
+    Return the keys of the object indices before the first .[] of expr, and
+    whether the order of the elements is kept until the .[]
+    Returns None if other operators come first
+    """
+    path = []
+    ordered = True
+    for op in expr:
+        if isinstance(op, ForEach):
+            return tuple(path), ordered
+        if isinstance(op, ObjectIndex) and ordered:
+            path.append(op.index)
+        elif isinstance(op, (Sort, SortBy)) and ordered:
+            ordered = False
+        else:
+            return None
+    return None
+
+
+def truncate(value, path: tuple[str, ...], size: int):
+    """
+    Return a copy of value with the array at path cut to size elements, or
+    None if there is no array of at least LARGE_ARRAY elements there
+    """
+    if not path:
+        if isinstance(value, list) and len(value) >= LARGE_ARRAY:
+            return value[:size]
+        return None
+    if not isinstance(value, dict) or path[0] not in value:
+        return None
+    truncated = truncate(value[path[0]], path[1:], size)
+    if truncated is None:
+        return None
+    # Only the dicts along the path are copied
+    copy = dict(value)
+    copy[path[0]] = truncated
+    return copy
+
+
 class Spec:
-    def __init__(self, examples: list[dict], constants: list):
+    def __init__(
+        self,
+        examples: list[dict],
+        constants: list,
+        sample_size: Optional[int] = SAMPLE_SIZE,
+    ):
         self.examples = examples
+        self.sample_size = sample_size
+        # Per sample path, the truncated input of every example (None if the
+        # example is not sampled)
+        self.samples: Dict[tuple, list] = {}
+        self.output_value_counts: Dict[int, Counter] = {}
         self.bool_constants = []
         self.int_constants = []
         self.str_constants = []
+        self.output_flattens = []
+        self._output_hashes: Optional[list[bytes]] = None
 
         for example in self.examples:
-            # example["flatten"] = frozenset(flatten(example["output"]))
-            example["flatten"] = list(frozenset(flatten(example["output"])))
+            self.output_flattens.append(frozenset(flatten(example["output"])))
 
         for constant in constants:
             if isinstance(constant, bool):
@@ -45,21 +134,81 @@ class Spec:
             if isinstance(constant, str):
                 self.str_constants.append(constant)
 
-    def verify(self, expr: Expr) -> tuple[Optional[str], int]:
+    def verify(self, expr: Expr) -> tuple[Optional[str], Optional[int]]:
         """
         Verify whether the expression satisfies the specification
         If yes, returns the string representation of the expression
         Otherwise, returns None
+        Expressions over large arrays are first verified on a sample of them
+        (see above), the score of those rejected there is None.
         """
         expr_str = construct(expr)
-        for example in self.examples:
-            output = pyjq.all(expr_str, example["input"])
+        if self.sample_size is not None:
+            plan = sample_path(expr)
+            if plan is not None and self.rejected_on_sample(expr_str, *plan):
+                return None, None
+        return self.verify_str(expr_str)
+
+    def rejected_on_sample(
+        self, expr_str: str, path: tuple[str, ...], ordered: bool = True
+    ) -> bool:
+        """
+        Run the expression on the inputs with the array at path truncated
+        Returns whether its output is not a prefix of the expected one, or not
+        contained in it if the elements are not ordered
+        """
+        samples = self.samples.get(path)
+        if samples is None:
+            samples = [
+                truncate(example["input"], path, self.sample_size)
+                for example in self.examples
+            ]
+            self.samples[path] = samples
+
+        for i, (example, sample) in enumerate(zip(self.examples, samples)):
+            if sample is None:
+                continue
+            output = run(expr_str, sample)
+            if ordered:
+                passed = output == example["output"][: len(output)]
+            else:
+                expected = self.output_counts(i)
+                counts = Counter(merkle_hash(value) for value in output)
+                passed = all(expected[h] >= n for h, n in counts.items())
+            if not passed:
+                return True
+        return False
+
+    def output_counts(self, i: int) -> Counter:
+        """
+        Multiset of the hashes of the expected output values of example i
+        """
+        if i not in self.output_value_counts:
+            self.output_value_counts[i] = Counter(
+                merkle_hash(value) for value in self.examples[i]["output"]
+            )
+        return self.output_value_counts[i]
+
+    @property
+    def output_hashes(self) -> list[bytes]:
+        """
+        Hashes of the expected outputs, for the callers that use them as keys
+        Outputs are compared by equality, hashing them is not cheaper
+        """
+        if self._output_hashes is None:
+            self._output_hashes = [
+                merkle_hash(example["output"]) for example in self.examples
+            ]
+        return self._output_hashes
+
+    def verify_str(self, expr_str: str) -> tuple[Optional[str], int]:
+        """
+        Verify a jq expression given as a string
+        """
+        for example, output_flatten in zip(self.examples, self.output_flattens):
+            output = run(expr_str, example["input"])
             if output != example["output"]:
-                return None, self.get_score(
-                    # frozenset(flatten(output)), example["flatten"]
-                    frozenset(flatten(output)),
-                    frozenset(example["flatten"]),
-                )
+                return None, self.get_score(frozenset(flatten(output)), output_flatten)
         return expr_str, 0
 
     def get_score(self, actual, expected):
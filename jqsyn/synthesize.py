@@ -6,47 +6,155 @@ TODO: Support recursive paths (including identity)
 from jqsyn.schema import get_schema, Schema, DictSchema, ListSchema
 from jqsyn.spec import Spec
 from jqsyn.pipeline import identity, Expr
-from queue import PriorityQueue
-from heapq import heappush, heappop
-from dataclasses import dataclass, field
-from copy import deepcopy
+from jqsyn.projection import project
+from jqsyn.abstract import AbstractFilter, AbstractValue
+from jqsyn.rewrite import is_canonical_extension
+from jqsyn.priors import Grammar, default_grammar, kind, START
+from collections import Counter
+from typing import Callable, Iterator, Optional, TYPE_CHECKING
+from heapq import heapify, heappush, heappop
+
+if TYPE_CHECKING:
+    from jqsyn.checkpoint import Checkpoint, Checkpointer, Frontier
+
+
+class Work:
+    """
+    Worklist entry of bottom_up, ordered by (priority, length, cost)
+    """
+
+    __slots__ = ("priority", "length", "cost", "expr", "schema", "state")
+
+    def __init__(
+        self,
+        priority: int,
+        length: int,
+        cost: float,
+        expr: Expr,
+        schema: Schema,
+        state: AbstractValue,
+    ):
+        self.priority = priority
+        self.length = length
+        self.cost = cost
+        self.expr = expr
+        self.schema = schema
+        self.state = state
+
+    def __lt__(self, other: "Work") -> bool:
+        return (self.priority, self.length, self.cost) < (
+            other.priority,
+            other.length,
+            other.cost,
+        )
 
 
 def bottom_up(
-    spec: Spec, input_schema: Schema, depth: int, max_results: int
+    spec: Spec,
+    input_schema: Schema,
+    depth: int,
+    max_results: int,
+    confirm: Optional[Spec] = None,
+    prefilter: Optional[AbstractFilter] = None,
+    priors: Optional[Grammar] = None,
+    stats: Optional[Counter] = None,
+    checkpoint: Optional["Checkpointer"] = None,
+    resume: Optional["Checkpoint"] = None,
+    poll: Optional[Callable[[list], None]] = None,
+    on_result: Optional[Callable[[str], None]] = None,
 ) -> list[str]:
     """
     Bottom up enumeration of jq parse expressions
+    If confirm is given, expressions satisfying spec are only accepted if they
+    also satisfy confirm
+    Non-canonical candidates are refused outright, the others go through
+    the abstract prefilter before they are verified.
+    Those it rejects inherit the priority of their parent, as do those
+    rejected on a sample of the input (see jqsyn.spec), and those it rejects
+    in the leaves domain are not expanded at all.
+    Ties in (score, length) are broken by the operator priors.
+    If stats is given, it counts the expanded and verified candidates.
+    The frontier is periodically saved to checkpoint, and the search starts
+    from the frontier and results of resume if given.
+    poll is called with the worklist before every expansion and before every
+    candidate. It may take work out of it (see snapshot) and raises to abort
+    the search. on_result is
+    called with every expression as soon as it is found.
     """
 
-    @dataclass(order=True)
-    class Work:
-        priority: int
-        length: int
-        expr: Expr = field(compare=False)
-        schema: Schema = field(compare=False)
+    if prefilter is None:
+        prefilter = AbstractFilter(spec)
+    if priors is None:
+        priors = default_grammar()
+    if stats is None:
+        stats = Counter()
 
     results = []
     worklist = []
-    expr_str, score = spec.verify(identity())
-    if expr_str is not None:
-        results.append(expr_str)
-        if len(results) == max_results:
-            return results
-    heappush(worklist, Work(score, 0, identity(), input_schema))
+    initial = prefilter.initial(spec)
+    if resume is not None:
+        results = list(resume.results)
+        for priority, length, cost, expr, schema in resume.frontier:
+            state = initial
+            for op in expr:
+                state = prefilter.transfer(state, op)
+            worklist.append(Work(priority, length, cost, expr, schema, state))
+        heapify(worklist)
+    else:
+        expr_str, score = spec.verify(identity())
+        stats["verified"] += 1
+        if expr_str is not None and confirm is not None:
+            expr_str = confirm.verify(identity())[0]
+        if expr_str is not None:
+            results.append(expr_str)
+            if on_result is not None:
+                on_result(expr_str)
+            if len(results) == max_results:
+                return results
+        heappush(worklist, Work(score, 0, 0.0, identity(), input_schema, initial))
     while len(worklist) > 0:
+        if checkpoint is not None and checkpoint.due():
+            checkpoint.save(snapshot(worklist), results, block=False)
+        if poll is not None:
+            poll(worklist)
+            if not worklist:
+                break
         work = heappop(worklist)
         expr, expr_schema = work.expr, work.schema
         if len(expr) >= depth:
             continue
+        stats["expanded"] += 1
+        prev = kind(expr[-1]) if expr else START
         for op, schema in expr_schema.rules(spec):
+            if not is_canonical_extension(expr, op):
+                continue
+            # A single expansion verifies many candidates over large inputs
+            if poll is not None:
+                poll(worklist)
             next_expr = expr + [op]
-            expr_str, score = spec.verify(next_expr)
-            if expr_str is not None:
-                results.append(expr_str)
-                if len(results) == max_results:
-                    return results
-            heappush(worklist, Work(score, len(next_expr), next_expr, schema))
+            state = prefilter.transfer(work.state, op)
+            domain = prefilter.reject(state, schema)
+            if domain == "leaves":
+                continue
+            if domain is not None:
+                score = work.priority
+            else:
+                expr_str, score = spec.verify(next_expr)
+                stats["verified"] += 1
+                if score is None:
+                    score = work.priority
+                if expr_str is not None and confirm is not None:
+                    expr_str = confirm.verify(next_expr)[0]
+                if expr_str is not None:
+                    results.append(expr_str)
+                    if on_result is not None:
+                        on_result(expr_str)
+                    if len(results) == max_results:
+                        return results
+            cost = work.cost + priors.cost(prev, kind(op))
+            heappush(
+                worklist, Work(score, len(next_expr), cost, next_expr, schema, state)
+            )
 
     if results:
         return results
@@ -54,6 +162,62 @@ def bottom_up(
         raise OutOfDepth(depth)
 
 
+def snapshot(worklist: list) -> "Frontier":
+    """
+    Return the worklist of bottom_up as (priority, length, cost, expr, schema)
+    frontier entries
+    """
+    return [(w.priority, w.length, w.cost, w.expr, w.schema) for w in worklist]
+
+
+def enumerate_pipelines(
+    spec: Spec,
+    input_schema: Schema,
+    depth: int,
+    prefilter: Optional[AbstractFilter] = None,
+    priors: Optional[Grammar] = None,
+) -> Iterator[tuple[Expr, Schema, float]]:
+    """
+    Breadth first enumeration of the canonical pipelines up to depth, with
+    their output schema and prior cost
+    If prefilter is given, only the pipelines it accepts are yielded and the
+    extensions of those it rejects in the leaves domain are skipped
+    """
+    if priors is None:
+        priors = default_grammar()
+
+    state = None
+    domain = None
+    if prefilter is not None:
+        state = prefilter.initial(spec)
+        domain = prefilter.reject(state, input_schema)
+        if domain == "leaves":
+            return
+    if domain is None:
+        yield identity(), input_schema, 0.0
+
+    level = [(identity(), input_schema, 0.0, state)]
+    for _ in range(depth):
+        next_level = []
+        for expr, expr_schema, cost, state in level:
+            prev = kind(expr[-1]) if expr else START
+            for op, schema in expr_schema.rules(spec):
+                if not is_canonical_extension(expr, op):
+                    continue
+                next_expr = expr + [op]
+                next_cost = cost + priors.cost(prev, kind(op))
+                next_state = None
+                if prefilter is not None:
+                    next_state = prefilter.transfer(state, op)
+                    domain = prefilter.reject(next_state, schema)
+                    if domain == "leaves":
+                        continue
+                if domain is None:
+                    yield next_expr, schema, next_cost
+                next_level.append((next_expr, schema, next_cost, next_state))
+        level = next_level
+
+
 def union_synthesis(
     input_schema,
     output_schema,
@@ -61,6 +225,7 @@ def union_synthesis(
     output_examples: list,
     constants: list,
     depth: int,
+    poll: Optional[Callable[[list], None]] = None,
 ) -> str:
     if isinstance(output_schema, DictSchema):
         union_dict = {}
@@ -75,6 +240,7 @@ def union_synthesis(
                 key_examples,
                 constants,
                 depth,
+                poll,
             )
         exprs = [f"{key}: {expr_str}" for key, expr_str in union_dict.items()]
         exprs = ", ".join(exprs)
@@ -84,58 +250,136 @@ def union_synthesis(
             {"input": input_example, "output": output_example}
             for input_example, output_example in zip(input_examples, output_examples)
         ]
-        return bottom_up(Spec(examples, constants), input_schema, depth, 1)[0]
+        return bottom_up(Spec(examples, constants), input_schema, depth, 1, poll=poll)[
+            0
+        ]
     else:
         examples = [
             {"input": input_example, "output": [output_example]}
             for input_example, output_example in zip(input_examples, output_examples)
         ]
-        return bottom_up(Spec(examples, constants), input_schema, depth, 1)[0]
+        return bottom_up(Spec(examples, constants), input_schema, depth, 1, poll=poll)[
+            0
+        ]
 
 
 def multi_synthesis(
-    examples: list[dict], constants: list = [], depth: int = 3, max_results: int = 1
+    examples: list[dict],
+    constants: list = [],
+    depth: int = 3,
+    max_results: int = 1,
+    checkpoint: Optional["Checkpointer"] = None,
+    resume: Optional["Checkpoint"] = None,
+    index=None,
+    poll: Optional[Callable[[list], None]] = None,
+    on_result: Optional[Callable[[str], None]] = None,
 ) -> list[str]:
     """
     Returns a jq parse expression string that satisfies the input-output examples
+    The enumerative search is checkpointed to checkpoint and continues from
+    resume if given
+    If an enumeration index over the example inputs and constants is given, it
+    is looked up before searching
+    poll and on_result are passed on to bottom_up
     """
+    if index is not None and resume is None:
+        results = index.lookup(examples, constants, max_results)
+        if results:
+            return results
+
     input_examples = [example["input"] for example in examples]
     input_schema = get_schema(input_examples)
+    phase = "projected" if resume is None else resume.phase
     try:
         spec = Spec(examples, constants)
-        return bottom_up(spec, input_schema, depth, max_results)
+        projected = project(examples, constants)
+        if projected is not examples and phase == "projected":
+            # Search on the projected inputs, confirm on the original ones
+            projected_schema = get_schema([example["input"] for example in projected])
+            if checkpoint is not None:
+                checkpoint.start("projected")
+            try:
+                return bottom_up(
+                    Spec(projected, constants),
+                    projected_schema,
+                    depth,
+                    max_results,
+                    confirm=spec,
+                    checkpoint=checkpoint,
+                    resume=resume,
+                    poll=poll,
+                    on_result=on_result,
+                )
+            except OutOfDepth:
+                resume = None
+        if checkpoint is not None:
+            checkpoint.start("original")
+        return bottom_up(
+            spec,
+            input_schema,
+            depth,
+            max_results,
+            checkpoint=checkpoint,
+            resume=resume,
+            poll=poll,
+            on_result=on_result,
+        )
     except OutOfDepth:
-        # message_examples = deepcopy(examples)
-        # name_examples = deepcopy(examples)
-        # parents_examples = deepcopy(examples)
-        # for example in message_examples:
-        #     example["output"] = [example["output"][0]["message"]]
-        # for example in name_examples:
-        #     example["output"] = [example["output"][0]["name"]]
-        # for example in parents_examples:
-        #     example["output"] = example["output"][0]["parents"]
-        # message_expr = bottom_up(Spec(message_examples, constants), input_schema, depth)
-        # name_expr = bottom_up(Spec(name_examples, constants), input_schema, depth)
-        # parents_expr = bottom_up(Spec(parents_examples, constants), input_schema, depth)
-        # return (
-        #     f"{{message: {message_expr}, name: {name_expr}, parents: [{parents_expr}]}}"
-        # )
-        output_examples = [example["output"][0] for example in examples]
-        output_schema = get_schema(output_examples)
-        return [
-            union_synthesis(
-                input_schema,
-                output_schema,
-                input_examples,
-                output_examples,
-                constants,
-                depth,
-            )
-        ]
+        return union_fallback(examples, constants, depth, poll)
 
 
-def synthesize(examples: list[dict], constants: list = [], depth: int = 3) -> str:
-    return multi_synthesis(examples, constants, depth)
+def union_fallback(
+    examples: list[dict],
+    constants: list,
+    depth: int,
+    poll: Optional[Callable[[list], None]] = None,
+) -> list[str]:
+    """
+    Synthesize the fields of single object outputs separately
+    """
+    # message_examples = deepcopy(examples)
+    # name_examples = deepcopy(examples)
+    # parents_examples = deepcopy(examples)
+    # for example in message_examples:
+    #     example["output"] = [example["output"][0]["message"]]
+    # for example in name_examples:
+    #     example["output"] = [example["output"][0]["name"]]
+    # for example in parents_examples:
+    #     example["output"] = example["output"][0]["parents"]
+    # message_expr = bottom_up(Spec(message_examples, constants), input_schema, depth)
+    # name_expr = bottom_up(Spec(name_examples, constants), input_schema, depth)
+    # parents_expr = bottom_up(Spec(parents_examples, constants), input_schema, depth)
+    # return (
+    #     f"{{message: {message_expr}, name: {name_expr}, parents: [{parents_expr}]}}"
+    # )
+    input_examples = [example["input"] for example in examples]
+    input_schema = get_schema(input_examples)
+    output_examples = [example["output"][0] for example in examples]
+    output_schema = get_schema(output_examples)
+    return [
+        union_synthesis(
+            input_schema,
+            output_schema,
+            input_examples,
+            output_examples,
+            constants,
+            depth,
+            poll,
+        )
+    ]
+
+
+def synthesize(
+    examples: list[dict],
+    constants: list = [],
+    depth: int = 3,
+    checkpoint: Optional["Checkpointer"] = None,
+    resume: Optional["Checkpoint"] = None,
+    index=None,
+) -> str:
+    return multi_synthesis(
+        examples, constants, depth, checkpoint=checkpoint, resume=resume, index=index
+    )
 
 
 class OutOfDepth(Exception):
@@ -0,0 +1,60 @@
+"""
+Test abstract prefilter
+"""
+
+import unittest
+
+from test.context import jqsyn
+from jqsyn.abstract import AbstractFilter
+from jqsyn.pipeline import ForEach, Keys, ObjectIndex, Select, EqualityPred
+from jqsyn.schema import get_schema, StrSchema, ListSchema
+from jqsyn.spec import Spec
+
+
+def run(prefilter, spec, expr):
+    state = prefilter.initial(spec)
+    for op in expr:
+        state = prefilter.transfer(state, op)
+    return state
+
+
+class TestAbstractFilter(unittest.TestCase):
+    def setUp(self):
+        examples = [
+            {
+                "input": [
+                    {"name": "JSON", "good": True},
+                    {"name": "XML", "good": False},
+                ],
+                "output": ["JSON"],
+            }
+        ]
+        self.spec = Spec(examples, [True])
+        self.prefilter = AbstractFilter(self.spec)
+
+    def test_leaves(self):
+        state = run(self.prefilter, self.spec, [ForEach(), ObjectIndex("good")])
+        self.assertEqual(self.prefilter.reject(state, StrSchema()), "leaves")
+
+    def test_type(self):
+        state = run(self.prefilter, self.spec, [ForEach()])
+        schema = get_schema([{"name": "JSON", "good": True}])
+        self.assertEqual(self.prefilter.reject(state, schema), "type")
+
+    def test_cardinality(self):
+        state = run(self.prefilter, self.spec, [ForEach(), ObjectIndex("name")])
+        self.assertEqual(self.prefilter.reject(state, StrSchema()), "cardinality")
+
+    def test_accept(self):
+        select = Select(EqualityPred(ObjectIndex("good"), True))
+        expr = [ForEach(), select, ObjectIndex("name")]
+        state = run(self.prefilter, self.spec, expr)
+        self.assertIsNone(self.prefilter.reject(state, StrSchema()))
+        self.assertEqual(dict(self.prefilter.rejections), {})
+
+    def test_length(self):
+        spec = Spec([{"input": {"foo": 1, "bar": 2}, "output": [["bar"]]}], [])
+        prefilter = AbstractFilter(spec)
+        state = run(prefilter, spec, [Keys()])
+        self.assertEqual(prefilter.reject(state, ListSchema(StrSchema())), "length")
+        self.assertEqual(prefilter.rejections["length"], 1)
@@ -0,0 +1,117 @@
+"""
+Test the asyncio interface
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest import mock
+
+from test.context import jqsyn
+from jqsyn import aio
+from jqsyn.abstract import AbstractFilter
+from jqsyn.schema import get_schema
+from jqsyn.spec import Spec
+from jqsyn.synthesize import bottom_up, OutOfDepth
+
+EXAMPLES = [
+    {
+        "input": [{"name": "JSON", "good": True}, {"name": "XML", "good": False}],
+        "output": [{"name": "JSON", "good": True}],
+    }
+]
+CONSTANTS = [True]
+IMPOSSIBLE = [
+    {
+        "input": [{"name": "JSON", "good": True}, {"name": "XML", "good": False}],
+        "output": ["XML", "JSON", "XML"],
+    }
+]
+
+
+async def collect(*args, **kwargs) -> list[str]:
+    return [expr_str async for expr_str in aio.synthesize_async(*args, **kwargs)]
+
+
+class TestAio(unittest.TestCase):
+    def test_results(self):
+        results = asyncio.run(collect(EXAMPLES, CONSTANTS, 3, 2))
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0], ".[] | select(.good == true)")
+        spec = Spec(EXAMPLES, CONSTANTS)
+        for expr_str in results:
+            self.assertEqual(spec.verify_str(expr_str), (expr_str, 0))
+
+    def test_cancellation(self):
+        transfers = []
+        stopped = threading.Event()
+        transfer = AbstractFilter.transfer
+
+        def slow_transfer(self, value, op):
+            transfers.append(op)
+            time.sleep(0.01)
+            return transfer(self, value, op)
+
+        def search(*args, **kwargs):
+            try:
+                return multi_synthesis(*args, **kwargs)
+            finally:
+                stopped.set()
+
+        async def main():
+            # No expression exists, the search would run to OutOfDepth
+            task = asyncio.create_task(collect(IMPOSSIBLE, [], 3, executor=pool))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        # The patches only apply to searches in this process
+        multi_synthesis = aio.multi_synthesis
+        with ThreadPoolExecutor(1) as pool:
+            with mock.patch.object(AbstractFilter, "transfer", slow_transfer):
+                with mock.patch.object(aio, "multi_synthesis", search):
+                    asyncio.run(main())
+                    self.assertTrue(stopped.wait(1))
+        # The full search transfers well over a hundred candidates
+        self.assertLess(len(transfers), 100)
+
+    def test_timeout(self):
+        transfer = AbstractFilter.transfer
+
+        def slow_transfer(self, value, op):
+            time.sleep(0.01)
+            return transfer(self, value, op)
+
+        with ThreadPoolExecutor(1) as pool:
+            with mock.patch.object(AbstractFilter, "transfer", slow_transfer):
+                with self.assertRaises(TimeoutError):
+                    asyncio.run(collect(IMPOSSIBLE, [], 3, timeout=0.05, executor=pool))
+
+    def test_process_cancellation(self):
+        async def main(pool):
+            # Runs for minutes unless cancelled
+            task = asyncio.create_task(collect(IMPOSSIBLE, [], 10, executor=pool))
+            await asyncio.sleep(0.5)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with ProcessPoolExecutor(1) as pool:
+            asyncio.run(main(pool))
+            # The only worker process is free again once the search stopped
+            self.assertEqual(pool.submit(int, "1").result(timeout=5), 1)
+
+    def test_poll_per_candidate(self):
+        polls = []
+        stats = Counter()
+        schema = get_schema([example["input"] for example in IMPOSSIBLE])
+        with self.assertRaises(OutOfDepth):
+            bottom_up(
+                Spec(IMPOSSIBLE, []), schema, 3, 1, stats=stats, poll=polls.append
+            )
+        # Once per expansion and once per candidate
+        self.assertGreater(len(polls), 2 * stats["expanded"])
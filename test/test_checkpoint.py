@@ -0,0 +1,68 @@
+"""
+Test checkpoint and resume
+"""
+
+import os
+import tempfile
+import unittest
+
+from test.context import jqsyn
+from jqsyn import checkpoint
+from jqsyn.checkpoint import Checkpointer
+from jqsyn.loader import load_spec
+from jqsyn.synthesize import multi_synthesis
+
+
+class TestCheckpoint(unittest.TestCase):
+    def test_resume(self):
+        data = load_spec(os.path.join("examples", "select.json"))
+        examples, constants = data["examples"], data["constants"]
+        expected = multi_synthesis(examples, constants, 3, 2)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "search.ckpt")
+            checkpointer = Checkpointer(path, examples, constants, 3, 2, interval=0)
+            self.assertEqual(
+                multi_synthesis(examples, constants, 3, 2, checkpoint=checkpointer),
+                expected,
+            )
+            checkpointer.wait()
+
+            resume = checkpoint.load(path)
+            self.assertLessEqual(len(resume.results), len(expected))
+            self.assertGreater(len(resume.frontier), 0)
+            self.assertEqual(
+                multi_synthesis(
+                    resume.examples,
+                    resume.constants,
+                    resume.depth,
+                    resume.max_results,
+                    resume=resume,
+                ),
+                expected,
+            )
+
+    def test_spec_written_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "search.ckpt")
+            checkpointer = Checkpointer(path, [{"input": 1, "output": [1]}], [], 3, 1)
+            checkpointer.start("original")
+            checkpointer.save([], [])
+            self.assertEqual(checkpoint.load(path).examples[0]["input"], 1)
+
+            # The spec is not rewritten by later checkpoints
+            os.remove(path + checkpoint.SPEC_SUFFIX)
+            checkpointer.save([], [".[]"])
+            self.assertFalse(os.path.exists(path + checkpoint.SPEC_SUFFIX))
+
+            with open(path + checkpoint.SPEC_SUFFIX, "w") as f:
+                f.write('{"examples": []}')
+            with self.assertRaises(ValueError):
+                checkpoint.load(path)
+
+    def test_not_a_checkpoint(self):
+        with tempfile.NamedTemporaryFile("wb") as f:
+            f.write(b"{}")
+            f.flush()
+            with self.assertRaises(ValueError):
+                checkpoint.load(f.name)
@@ -0,0 +1,33 @@
+"""
+Test compact representation
+"""
+
+import io
+import json
+import unittest
+
+from test.context import jqsyn
+from jqsyn.compact import Interner, load, loads
+
+
+class TestCompact(unittest.TestCase):
+    def test_equal(self):
+        value = {"foo": [1, True, None, 2.5, "bar"], "baz": {"qux": []}}
+        self.assertEqual(loads(json.dumps(value)), value)
+
+    def test_shared_strings(self):
+        text = '[{"name": "JSON", "good": true}, {"name": "JSON", "good": true}]'
+        result = load(io.StringIO(text))
+        self.assertEqual(result, json.loads(text))
+        self.assertIs(result[0]["name"], result[1]["name"])
+        self.assertIsNot(result[0], result[1])
+
+    def test_across_documents(self):
+        interner = Interner()
+        first = loads('{"name": "JSON"}', interner)
+        second = loads('{"name": "JSON"}', interner)
+        self.assertIs(first["name"], second["name"])
+
+    def test_key_order(self):
+        result = loads('[{"foo": 1, "bar": 2}, {"bar": 2, "foo": 1}]')
+        self.assertEqual(list(result[1].keys()), ["bar", "foo"])
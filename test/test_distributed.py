@@ -0,0 +1,212 @@
+"""
+Test the distributed search on local workers
+"""
+
+import os
+import unittest
+from unittest import mock
+from multiprocessing import AuthenticationError, Process
+from multiprocessing.connection import Client
+from threading import Thread
+
+from test.context import jqsyn
+from jqsyn.distributed import Coordinator, distributed_synthesis, partition
+from jqsyn.distributed import run_local_worker, run_worker, NoWorkers, STOP_TIMEOUT
+from jqsyn.pipeline import identity, ForEach
+from jqsyn.schema import get_schema
+from jqsyn.shared import SharedExamples
+from jqsyn.spec import Spec
+from jqsyn.synthesize import bottom_up
+
+EXAMPLES = [
+    {
+        "input": [{"name": "JSON", "good": True}, {"name": "XML", "good": False}],
+        "output": [{"name": "JSON", "good": True}],
+    },
+    {
+        "input": [{"name": "YAML", "good": True}, {"name": "CSV", "good": True}],
+        "output": [{"name": "YAML", "good": True}, {"name": "CSV", "good": True}],
+    },
+]
+CONSTANTS = [True]
+
+# Long enough a search at depth 5 for the idle workers to steal from the busy
+# one
+TOOLS = [
+    {"name": "jq", "lang": "C", "year": 2012, "tags": ["json", "cli"]},
+    {"name": "yq", "lang": "Go", "year": 2017, "tags": ["yaml"]},
+    {"name": "fx", "lang": "Go", "year": 2018, "tags": ["json"]},
+]
+WIDE = [{"input": TOOLS, "output": ["jq", "yq", "fx"]}]
+
+
+class TestDistributed(unittest.TestCase):
+    def test_partition(self):
+        spec = Spec(EXAMPLES, CONSTANTS)
+        schema = get_schema([example["input"] for example in EXAMPLES])
+        results, partitions = partition(spec, schema, 3, 1)
+        self.assertEqual(results, [])
+        self.assertGreater(len(partitions), 1)
+        for frontier in partitions:
+            self.assertEqual(len(frontier), 1)
+            self.assertEqual(len(frontier[0][3]), 1)
+
+        # Nothing left to hand out past the depth
+        _, partitions = partition(spec, schema, 1, 1)
+        self.assertEqual(partitions, [])
+
+    def test_workers(self):
+        results = distributed_synthesis(EXAMPLES, CONSTANTS, 3, 2, workers=3)
+        self.assertEqual(len(results), 2)
+        spec = Spec(EXAMPLES, CONSTANTS)
+        for expr_str in results:
+            self.assertEqual(spec.verify_str(expr_str), (expr_str, 0))
+
+    def test_answered_in_partition(self):
+        # The coordinator finds the answer before any worker connects
+        examples = [{"input": {"a": 1}, "output": [{"a": 1}]}]
+        self.assertEqual(distributed_synthesis(examples, [], 3, 1, workers=2), ["."])
+
+        coordinator = Coordinator(examples, [], 3, 1)
+        worker = Process(
+            target=run_local_worker,
+            args=(coordinator.sock, coordinator.address, coordinator.authkey, None),
+        )
+        worker.start()
+        self.assertEqual(coordinator.run([worker]), ["."])
+        worker.join(STOP_TIMEOUT)
+        self.assertEqual(worker.exitcode, 0)
+
+    def test_steal(self):
+        # A single partition for three workers, the idle ones steal from the
+        # busy one
+        schema = get_schema([TOOLS])
+        expected = bottom_up(Spec(WIDE, []), schema, 5, 1000)
+        whole = [[(0, 0, 0.0, identity(), schema)]]
+
+        coordinator = Coordinator(WIDE, [], 5, 1000)
+        workers = [
+            Process(
+                target=run_local_worker,
+                args=(coordinator.sock, coordinator.address, coordinator.authkey, None),
+            )
+            for _ in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        with mock.patch("jqsyn.distributed.partition", return_value=([], whole)):
+            results = coordinator.run(workers)
+        for worker in workers:
+            worker.join()
+
+        self.assertGreater(coordinator.stats["donated"], 0)
+        self.assertGreater(coordinator.stats["handed"], 1)
+        self.assertEqual(sorted(results), sorted(expected))
+
+    def test_steal_race(self):
+        # Fake workers, the coordinator does not look into the frontiers
+        whole = [(0, 0, 0.0, identity(), None)]
+        donated = [(0, 1, 0.0, [ForEach()], None)]
+        coordinator = Coordinator(EXAMPLES, CONSTANTS, 3, 2)
+        results = []
+        with mock.patch("jqsyn.distributed.partition", return_value=([], [whole])):
+            thread = Thread(target=lambda: results.extend(coordinator.run()))
+            thread.start()
+
+            def join():
+                conn = Client(coordinator.address, authkey=coordinator.authkey)
+                conn.send(("join", None))
+                self.assertEqual(conn.recv()[0], "spec")
+                conn.send(("ready",))
+                return conn
+
+            first = join()
+            self.assertEqual(first.recv(), ("work", whole))
+            # The second worker is idle, the busy one donates to it
+            second = join()
+            self.assertEqual(first.recv(), ("steal",))
+            first.send(("result", ".[]"))
+            first.send(("donate", donated))
+            self.assertEqual(second.recv(), ("work", donated))
+
+            # The first worker is done, the second one is asked to donate but
+            # is done too before it sees the request
+            first.send(("ready",))
+            self.assertEqual(second.recv(), ("steal",))
+            second.send(("ready",))
+            second.send(("donate", []))
+            self.assertEqual(first.recv(), ("stop",))
+            self.assertEqual(second.recv(), ("stop",))
+            thread.join()
+
+        self.assertEqual(results, [".[]"])
+        self.assertEqual(coordinator.stats, {"handed": 2, "donated": 1})
+
+    def test_remote_worker(self):
+        coordinator = Coordinator(EXAMPLES, CONSTANTS, 3, 1)
+        worker = Process(
+            target=run_worker, args=(coordinator.address, coordinator.authkey)
+        )
+        worker.start()
+        try:
+            results = coordinator.run()
+        finally:
+            worker.join()
+        self.assertEqual(len(results), 1)
+
+    def test_wrong_authkey(self):
+        coordinator = Coordinator(EXAMPLES, CONSTANTS, 3, 1)
+        results = []
+        thread = Thread(target=lambda: results.extend(coordinator.run()))
+        thread.start()
+        with self.assertRaises(AuthenticationError):
+            Client(coordinator.address, authkey=b"wrong")
+        worker = Process(
+            target=run_worker, args=(coordinator.address, coordinator.authkey)
+        )
+        worker.start()
+        thread.join()
+        worker.join()
+        self.assertEqual(len(results), 1)
+
+    def test_no_workers(self):
+        coordinator = Coordinator(EXAMPLES, CONSTANTS, 3, 1, worker_timeout=0)
+        with self.assertRaises(NoWorkers):
+            coordinator.run()
+
+        # Every local worker exited before connecting
+        coordinator = Coordinator(EXAMPLES, CONSTANTS, 3, 1)
+        process = Process(target=int)
+        process.start()
+        process.join()
+        with self.assertRaises(NoWorkers):
+            coordinator.run([process])
+
+    def test_worker_authkey(self):
+        coordinators = [Coordinator(EXAMPLES, CONSTANTS) for _ in range(2)]
+        for coordinator in coordinators:
+            coordinator.sock.close()
+        self.assertNotEqual(coordinators[0].authkey, coordinators[1].authkey)
+        with mock.patch.dict(os.environ, {"JQSYN_AUTHKEY": ""}):
+            with self.assertRaises(ValueError):
+                run_worker(("localhost", 1))
+
+    def test_shared_examples(self):
+        with SharedExamples(EXAMPLES, CONSTANTS) as shared:
+            coordinator = Coordinator(EXAMPLES, CONSTANTS, 3, 1, segment=shared.name)
+            results = []
+            thread = Thread(target=lambda: results.extend(coordinator.run()))
+            thread.start()
+            conn = Client(coordinator.address, authkey=coordinator.authkey)
+            conn.send(("join", shared.name))
+            self.assertEqual(conn.recv(), ("spec", None, None, 3, 1))
+            conn.close()
+
+            worker = Process(
+                target=run_worker,
+                args=(coordinator.address, coordinator.authkey, shared.name),
+            )
+            worker.start()
+            thread.join()
+            worker.join()
+        self.assertEqual(len(results), 1)
@@ -0,0 +1,59 @@
+"""
+Test enumeration index
+"""
+
+import os
+import tempfile
+import unittest
+
+from test.context import jqsyn
+from jqsyn import index
+from jqsyn.index import Index
+
+INPUTS = [
+    [{"name": "JSON", "good": True}, {"name": "XML", "good": False}],
+    [{"name": "YAML", "good": False}, {"name": "TOML", "good": True}],
+]
+
+
+class TestIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(cls.tmp.name, "index")
+        cls.count = index.build(INPUTS, [True], 3, path)
+        cls.index = Index(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.index.close()
+        cls.tmp.cleanup()
+
+    def test_lookup(self):
+        examples = [
+            {"input": INPUTS[1], "output": ["YAML", "TOML"]},
+            {"input": INPUTS[0], "output": ["JSON", "XML"]},
+        ]
+        self.assertEqual(self.index.lookup(examples, [True]), [".[] | .name"])
+
+    def test_ranking(self):
+        examples = [{"input": INPUTS[0], "output": [INPUTS[0][0]]}]
+        results = self.index.lookup(examples, [True], self.count)
+        self.assertEqual(results[0], ".[] | select(.good == true)")
+        self.assertEqual(
+            [len(result.split("|")) for result in results],
+            sorted(len(result.split("|")) for result in results),
+        )
+
+    def test_no_match(self):
+        examples = [{"input": INPUTS[0], "output": ["TOML"]}]
+        self.assertEqual(self.index.lookup(examples, [True]), [])
+
+    def test_not_indexed(self):
+        examples = [{"input": [], "output": []}]
+        self.assertIsNone(self.index.lookup(examples, [True]))
+
+    def test_other_constants(self):
+        examples = [{"input": INPUTS[0], "output": [INPUTS[0][0]]}]
+        self.assertIsNone(self.index.lookup(examples, []))
+        self.assertIsNone(self.index.lookup(examples, [True, "JSON"]))
@@ -0,0 +1,47 @@
+"""
+Test spec loading
+"""
+
+import json, os
+import tempfile
+import unittest
+
+from test.context import jqsyn
+from jqsyn.loader import load_spec
+
+
+class TestLoader(unittest.TestCase):
+    def test_examples(self):
+        for filename in sorted(os.listdir("examples")):
+            path = os.path.join("examples", filename)
+            keys = ("examples", "constants", "expression")
+            with open(path, "r") as f:
+                try:
+                    data = json.load(f)
+                except ValueError:
+                    with self.assertRaises(ValueError, msg=filename):
+                        load_spec(path, keys)
+                    continue
+            expected = {key: data[key] for key in keys if key in data}
+            self.assertEqual(load_spec(path, keys), expected, filename)
+
+    def test_skipped_members(self):
+        text = '{"expression": ".[] | \\"]}\\"", "examples" : [ ], "extra": [{}]}'
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as f:
+            f.write(text)
+            f.flush()
+            self.assertEqual(load_spec(f.name), {"examples": []})
+
+    def test_malformed(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as f:
+            f.write('{"examples": [{"input": 1}')
+            f.flush()
+            with self.assertRaises(ValueError):
+                load_spec(f.name)
+
+    def test_extra_data(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as f:
+            f.write('{"examples": []} []')
+            f.flush()
+            with self.assertRaises(ValueError):
+                load_spec(f.name)
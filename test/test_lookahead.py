@@ -0,0 +1,83 @@
+"""
+Test the search with output lookahead
+"""
+
+import unittest
+
+from test.context import jqsyn
+from jqsyn.lookahead import apply, backward_key, lookahead_synthesis
+from jqsyn.lookahead import forward_key, Error
+from jqsyn.pipeline import ForEach, GroupBy, Keys, ObjectIndex, Select, Sort
+from jqsyn.pipeline import EqualityPred
+from jqsyn.schema import get_schema
+from jqsyn.spec import Spec
+from jqsyn.synthesize import bottom_up, OutOfDepth
+
+EXAMPLES = [
+    {
+        "input": [
+            {"name": "XML", "good": False, "year": 1996},
+            {"name": "JSON", "good": True, "year": 2001},
+            {"name": "YAML", "good": True, "year": 2001},
+        ],
+        "output": ["JSON", "YAML"],
+    }
+]
+CONSTANTS = [True]
+
+
+class TestWitnesses(unittest.TestCase):
+    def test_sort(self):
+        self.assertEqual(
+            forward_key(Sort(), [[3, 1, 2], [2, 2]]),
+            backward_key("sort", [[1, 2, 3], [2, 2]]),
+        )
+        self.assertNotEqual(
+            forward_key(Sort(), [[3, 1]]), backward_key("sort", [[1, 2, 3]])
+        )
+        with self.assertRaises(Error):
+            forward_key(Sort(), [{"a": 1}])
+
+    def test_group_by(self):
+        stream = [[{"a": 1}, {"a": 2}, {"a": 1}]]
+        output = [[[{"a": 1}, {"a": 1}], [{"a": 2}]]]
+        self.assertEqual(
+            forward_key(GroupBy(ObjectIndex("a")), stream),
+            backward_key("group_by", output),
+        )
+        self.assertIsNone(backward_key("group_by", [[1, 2]]))
+
+    def test_keys(self):
+        self.assertEqual(
+            forward_key(Keys(), [{"b": 1, "a": 2}]), backward_key("keys", [["a", "b"]])
+        )
+        self.assertEqual(forward_key(Keys(), [[5, 6]]), backward_key("keys", [[0, 1]]))
+
+    def test_apply(self):
+        stream = [{"name": "JSON", "good": True}, {"name": "XML", "good": False}]
+        self.assertEqual(apply(ObjectIndex("name"), stream), ["JSON", "XML"])
+        self.assertEqual(
+            apply(Select(EqualityPred(ObjectIndex("good"), True)), stream), stream[:1]
+        )
+        self.assertEqual(apply(ForEach(), [[1, 2], {"a": 3}]), [1, 2, 3])
+        with self.assertRaises(Error):
+            apply(ObjectIndex("name"), [[1]])
+
+
+class TestLookahead(unittest.TestCase):
+    def test_synthesis(self):
+        results = lookahead_synthesis(EXAMPLES, CONSTANTS, 3, 1)
+        self.assertEqual(results, [".[] | select(.good == true) | .name"])
+
+    def test_same_as_bottom_up(self):
+        # Every expression up to the depth is found by both searches
+        spec = Spec(EXAMPLES, CONSTANTS)
+        schema = get_schema([example["input"] for example in EXAMPLES])
+        expected = bottom_up(spec, schema, 3, 1000)
+        results = lookahead_synthesis(EXAMPLES, CONSTANTS, 3, 1000)
+        self.assertEqual(sorted(results), sorted(expected))
+
+    def test_out_of_depth(self):
+        examples = [{"input": {"a": 1}, "output": [2]}]
+        with self.assertRaises(OutOfDepth):
+            lookahead_synthesis(examples, [], 3)
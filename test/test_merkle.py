@@ -0,0 +1,38 @@
+"""
+Test Merkle hashing
+"""
+
+import unittest
+
+from test.context import jqsyn
+from jqsyn.merkle import merkle_hash
+
+
+class TestMerkle(unittest.TestCase):
+    def test_scalars(self):
+        self.assertEqual(merkle_hash("42"), merkle_hash("42"))
+        self.assertNotEqual(merkle_hash("42"), merkle_hash(42))
+        self.assertNotEqual(merkle_hash(1), merkle_hash(True))
+        self.assertNotEqual(merkle_hash(None), merkle_hash(False))
+        self.assertEqual(merkle_hash(2), merkle_hash(2.0))
+
+    def test_dict_order(self):
+        self.assertEqual(
+            merkle_hash({"foo": 1, "bar": [2, 3]}),
+            merkle_hash({"bar": [2, 3], "foo": 1}),
+        )
+        self.assertNotEqual(merkle_hash({"foo": 1}), merkle_hash({"bar": 1}))
+
+    def test_list_order(self):
+        self.assertNotEqual(merkle_hash([1, 2]), merkle_hash([2, 1]))
+        self.assertNotEqual(merkle_hash([[1], 2]), merkle_hash([1, [2]]))
+
+    def test_subtrees(self):
+        subtrees = set()
+        value = {"foo": [1, "bar"], "baz": None}
+        digest = merkle_hash(value, subtrees)
+        self.assertIn(digest, subtrees)
+        self.assertIn(merkle_hash([1, "bar"]), subtrees)
+        self.assertIn(merkle_hash("bar"), subtrees)
+        self.assertIn(merkle_hash(None), subtrees)
+        self.assertEqual(len(subtrees), 5)
@@ -0,0 +1,56 @@
+"""
+Test operator priors
+"""
+
+import os
+import tempfile
+import unittest
+
+from test.context import jqsyn
+from jqsyn.pipeline import ForEach, ObjectIndex, Sort
+from jqsyn.priors import Grammar, kind, parse_kinds, pipelines, START
+
+
+class TestParse(unittest.TestCase):
+    def test_pipeline(self):
+        self.assertEqual(
+            parse_kinds('.[] | select(.location=="a|b") | .name'),
+            ["ForEach", "Select", "ObjectIndex"],
+        )
+        self.assertEqual(parse_kinds(".foo.bar"), ["ObjectIndex", "ObjectIndex"])
+        self.assertEqual(parse_kinds(".users[]"), ["ObjectIndex", "ForEach"])
+        self.assertEqual(parse_kinds("."), [])
+        self.assertIsNone(parse_kinds(".[0]"))
+
+    def test_constructions(self):
+        self.assertEqual(
+            pipelines("{user: .user, title: [.titles | .[]]}"),
+            [["ObjectIndex"], ["ObjectIndex", "ForEach"]],
+        )
+
+
+class TestGrammar(unittest.TestCase):
+    def test_cost(self):
+        grammar = Grammar()
+        grammar.train(["ForEach", "ObjectIndex"])
+        grammar.train(["ForEach", "ObjectIndex"])
+        self.assertLess(
+            grammar.cost(START, kind(ForEach())), grammar.cost(START, kind(Sort()))
+        )
+        self.assertLess(
+            grammar.cost(kind(ForEach()), kind(ObjectIndex("foo"))),
+            grammar.cost(kind(ForEach()), kind(Sort())),
+        )
+
+    def test_uniform(self):
+        grammar = Grammar()
+        self.assertEqual(grammar.cost(START, "Sort"), grammar.cost(START, "Keys"))
+
+    def test_save_load(self):
+        grammar = Grammar()
+        grammar.train(["Keys", "Sort"])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "priors.json")
+            grammar.save(path)
+            loaded = Grammar.load(path)
+        self.assertEqual(loaded.bigrams, grammar.bigrams)
@@ -0,0 +1,51 @@
+"""
+Test input projection
+"""
+
+import unittest
+
+from test.context import jqsyn
+from jqsyn.projection import project
+
+
+class TestProjection(unittest.TestCase):
+    def test_drop_fields(self):
+        examples = [
+            {
+                "input": {"sha": "cff5", "commit": {"message": "docs", "url": "x"}},
+                "output": ["docs"],
+            }
+        ]
+        projected = project(examples, [])
+        self.assertEqual(projected[0]["input"], {"commit": {"message": "docs"}})
+        self.assertEqual(projected[0]["output"], ["docs"])
+
+    def test_list_paths(self):
+        examples = [
+            {
+                "input": [{"name": "JSON", "id": 1}, {"name": "XML", "id": 2}],
+                "output": ["JSON"],
+            }
+        ]
+        projected = project(examples, [])
+        self.assertEqual(projected[0]["input"], [{"name": "JSON"}, {"name": "XML"}])
+
+    def test_constants_and_keys(self):
+        examples = [
+            {
+                "input": [{"good": True, "id": 1, "note": None}, {"good": False}],
+                "output": [{"note": None}],
+            }
+        ]
+        projected = project(examples, [True])
+        self.assertEqual(
+            projected[0]["input"], [{"good": True, "note": None}, {"good": False}]
+        )
+
+    def test_keys_kept_whole(self):
+        examples = [{"input": {"foo": 1, "bar": 2}, "output": [["bar", "foo"]]}]
+        self.assertIs(project(examples, []), examples)
+
+    def test_nothing_relevant(self):
+        examples = [{"input": {"foo": 1}, "output": []}]
+        self.assertIs(project(examples, []), examples)
@@ -0,0 +1,60 @@
+"""
+Test pipeline rewrites
+"""
+
+import unittest
+
+from test.context import jqsyn
+from jqsyn.pipeline import (
+    construct,
+    All,
+    ForEach,
+    GroupBy,
+    Keys,
+    ObjectIndex,
+    Select,
+    EqualityPred,
+    Sort,
+    SortBy,
+)
+from jqsyn.rewrite import canonicalize, is_canonical, is_canonical_extension
+
+
+def select(value):
+    return Select(EqualityPred(ObjectIndex("foo"), value))
+
+
+class TestRewrite(unittest.TestCase):
+    def test_redundant_sorts(self):
+        self.assertEqual(construct(canonicalize([Sort(), Sort(), Sort()])), "sort")
+        self.assertEqual(construct(canonicalize([Keys(), Sort()])), "keys")
+        self.assertEqual(
+            construct(canonicalize([SortBy(ObjectIndex("foo")), Sort()])), "sort"
+        )
+        self.assertEqual(construct(canonicalize([Sort(), All()])), "all")
+        self.assertEqual(
+            construct(
+                canonicalize([SortBy(ObjectIndex("foo")), GroupBy(ObjectIndex("foo"))])
+            ),
+            "group_by(.foo)",
+        )
+
+    def test_distinct_sort_by(self):
+        expr = [SortBy(ObjectIndex("foo")), SortBy(ObjectIndex("bar"))]
+        self.assertTrue(is_canonical(expr))
+        self.assertFalse(
+            is_canonical([SortBy(ObjectIndex("foo")), SortBy(ObjectIndex("foo"))])
+        )
+
+    def test_selects(self):
+        self.assertEqual(
+            construct(canonicalize([select(2), select(1), select(2)])),
+            "select(.foo == 1) | select(.foo == 2)",
+        )
+        self.assertTrue(is_canonical_extension([ForEach(), select(1)], select(2)))
+        self.assertFalse(is_canonical_extension([ForEach(), select(2)], select(1)))
+
+    def test_canonical(self):
+        expr = [ForEach(), Sort(), ForEach()]
+        self.assertTrue(is_canonical(expr))
+        self.assertEqual(construct(canonicalize(expr)), construct(expr))
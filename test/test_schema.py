@@ -120,3 +120,23 @@ class TestRules(unittest.TestCase):
             ]
         )
         self.assertEqual(rules, expected)
+
+    def test_dict_str_constant(self):
+        class StrSpec(RuleSpec):
+            def get_str_constants(self) -> list[str]:
+                return ["JSON"]
+
+        example = {"name": "XML"}
+        schema = get_schema([example])
+        rules = sorted(
+            [(str(op), str(schema)) for op, schema in schema.rules(StrSpec())]
+        )
+        expected = sorted(
+            [
+                (".[]", "StrSchema"),
+                ("keys", "ListSchema[StrSchema]"),
+                (".name", "StrSchema"),
+                ('select(.name == "JSON")', "DictSchema{name: StrSchema}{StrSchema}"),
+            ]
+        )
+        self.assertEqual(rules, expected)
@@ -0,0 +1,43 @@
+"""
+Test incremental synthesis sessions
+"""
+
+import unittest
+
+from test.context import jqsyn
+from jqsyn.session import Session
+from jqsyn.synthesize import OutOfDepth
+
+
+def example(records, good):
+    return {"input": records, "output": [record for record in records if good(record)]}
+
+
+class TestSession(unittest.TestCase):
+    def test_add_counterexample(self):
+        records = [
+            {"name": "JSON", "good": True, "id": 1},
+            {"name": "XML", "good": False, "id": 2},
+        ]
+        session = Session([example(records, lambda r: r["id"] == 1)], [True, 1])
+        self.assertEqual(session.synthesize(), [".[] | select(.good == true)"])
+
+        # .good == true is refuted, .id == 1 is retained
+        records = [
+            {"name": "A", "good": True, "id": 3},
+            {"name": "B", "good": False, "id": 1},
+        ]
+        retained = len(session.candidates)
+        self.assertEqual(
+            session.add_example(example(records, lambda r: r["id"] == 1)),
+            [".[] | select(.id == 1)"],
+        )
+        self.assertLess(len(session.candidates), retained)
+        self.assertTrue(all(len(c.hashes) == 2 for c in session.candidates))
+
+    def test_fallback(self):
+        session = Session([{"input": {"foo": 1}, "output": [1]}])
+        self.assertEqual(session.synthesize(), [".foo"])
+        with self.assertRaises(OutOfDepth):
+            session.add_example({"input": {"foo": 2}, "output": [3]})
+        self.assertEqual(session.candidates, [])
@@ -0,0 +1,37 @@
+"""
+Test sharing examples with worker processes
+"""
+
+import unittest
+from functools import partial
+from multiprocessing import Pool
+
+from test.context import jqsyn
+from jqsyn.shared import SharedExamples, attach, verify_shared
+from jqsyn.spec import Spec
+
+EXAMPLES = [
+    {
+        "input": [{"name": "JSON", "good": True}, {"name": "XML", "good": False}],
+        "output": [{"name": "JSON", "good": True}],
+    }
+]
+CONSTANTS = [True]
+CANDIDATES = [".", ".[]", ".[] | select(.good == true)", ".[] | .name"]
+
+
+class TestShared(unittest.TestCase):
+    def test_attach(self):
+        with SharedExamples(EXAMPLES, CONSTANTS) as shared:
+            spec = attach(shared.name)
+            self.assertEqual(spec.examples, EXAMPLES)
+            self.assertEqual(spec.get_bool_constants(), [True])
+
+    def test_pool(self):
+        expected = [Spec(EXAMPLES, CONSTANTS).verify_str(c) for c in CANDIDATES]
+        with SharedExamples(EXAMPLES, CONSTANTS) as shared:
+            with Pool(2) as pool:
+                chunks = [[c] for c in CANDIDATES]
+                results = pool.map(partial(verify_shared, shared.name), chunks)
+        self.assertEqual([result for chunk in results for result in chunk], expected)
+        self.assertEqual(expected[2], (".[] | select(.good == true)", 0))
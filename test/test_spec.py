@@ -0,0 +1,72 @@
+"""
+Test staged verification on large arrays
+"""
+
+import unittest
+from unittest import mock
+
+from test.context import jqsyn
+from jqsyn import spec as spec_module
+from jqsyn.pipeline import ForEach, ObjectIndex, Select, Sort, SortBy
+from jqsyn.pipeline import EqualityPred
+from jqsyn.spec import run, sample_path, truncate, Spec, LARGE_ARRAY
+
+ITEMS = [{"id": f"item{i}", "stock": i % 3 == 0} for i in range(LARGE_ARRAY)]
+INPUT = {"items": ITEMS, "count": LARGE_ARRAY}
+IN_STOCK = [ForEach(), Select(EqualityPred(ObjectIndex("stock"), True))]
+
+
+class TestSampling(unittest.TestCase):
+    def test_sample_path(self):
+        self.assertEqual(sample_path([ForEach()]), ((), True))
+        self.assertEqual(
+            sample_path([ObjectIndex("a"), ObjectIndex("b"), ForEach(), Sort()]),
+            (("a", "b"), True),
+        )
+        self.assertEqual(
+            sample_path([ObjectIndex("a"), SortBy(ObjectIndex("b")), ForEach()]),
+            (("a",), False),
+        )
+        self.assertIsNone(sample_path([Sort(), Sort(), ForEach()]))
+        self.assertIsNone(sample_path([ObjectIndex("a")]))
+
+    def test_truncate(self):
+        truncated = truncate(INPUT, ("items",), 2)
+        self.assertEqual(truncated, {"items": ITEMS[:2], "count": LARGE_ARRAY})
+        self.assertEqual(len(INPUT["items"]), LARGE_ARRAY)
+        self.assertIsNone(truncate(INPUT, ("count",), 2))
+        self.assertIsNone(truncate({"items": ITEMS[:10]}, ("items",), 2))
+
+    def test_same_answers(self):
+        items = [ObjectIndex("items")]
+        cases = [
+            (INPUT, ".items | .[] | .id", items),
+            (ITEMS, ".[] | select(.stock == true)", []),
+        ]
+        for value, expr_str, prefix in cases:
+            example = {"input": value, "output": run(expr_str, value)}
+            staged = Spec([example], [True])
+            full = Spec([example], [True], sample_size=None)
+            for expr in [
+                prefix + [ForEach(), ObjectIndex("id")],
+                prefix + [SortBy(ObjectIndex("id")), ForEach()],
+                prefix + [Sort(), ForEach(), ObjectIndex("id")],
+                prefix + [ForEach()],
+                prefix + IN_STOCK,
+            ]:
+                self.assertEqual(staged.verify(expr)[0], full.verify(expr)[0])
+
+    def test_rejected_on_sample(self):
+        example = {"input": ITEMS, "output": run(".[] | .id", ITEMS)}
+        spec = Spec([example], [True])
+        with mock.patch.object(spec_module, "run", wraps=run) as wrapped:
+            # No score, the candidate inherits the priority of its parent
+            self.assertEqual(spec.verify(IN_STOCK), (None, None))
+            # Only the sample was run
+            self.assertEqual(len(wrapped.call_args_list), 1)
+            self.assertEqual(len(wrapped.call_args.args[1]), spec_module.SAMPLE_SIZE)
+
+            self.assertEqual(
+                spec.verify([ForEach(), ObjectIndex("id")])[0], ".[] | .id"
+            )
+            self.assertEqual(len(wrapped.call_args.args[1]), LARGE_ARRAY)
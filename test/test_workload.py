@@ -0,0 +1,32 @@
+"""
+Test the synthetic workload generator
+"""
+
+import unittest
+
+from test.context import jqsyn
+from bench.workload import generate
+from jqsyn.schema import get_schema
+from jqsyn.spec import try_run, Spec
+from jqsyn.synthesize import bottom_up
+
+
+class TestWorkload(unittest.TestCase):
+    def test_generate(self):
+        for seed in range(5):
+            data = generate(width=4, nesting=1, length=5, depth=2, seed=seed)
+            examples, constants = data["examples"], data["constants"]
+            self.assertEqual(len(examples), 2)
+            for example in examples:
+                self.assertEqual(len(example["input"]), 5)
+                self.assertEqual(
+                    try_run(data["expression"], example["input"]), example["output"]
+                )
+
+            # The ground truth is in the search space of bottom_up
+            spec = Spec(examples, constants)
+            schema = get_schema([example["input"] for example in examples])
+            self.assertIn(data["expression"], bottom_up(spec, schema, 2, 1000))
+
+    def test_seed(self):
+        self.assertEqual(generate(seed=3), generate(seed=3))